@@ -0,0 +1,176 @@
+"""
+Throughput benchmarks for the lexer, the parser and ValidatorEngine.validate_query.
+
+    python benchmarks/bench.py                      # run and print the table
+    python benchmarks/bench.py --save-baseline      # record benchmarks/baseline.json
+    python benchmarks/bench.py --check              # exit 1 on a regression vs the baseline
+
+Each stage is timed best-of --repeat over a seeded corpus (see corpus.py); peak
+memory is measured in a separate tracemalloc run so it does not skew the timings.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.corpus import generate_corpus
+from engine.lexer import RegexLexer
+from engine.parser import Parser
+from engine.token_buffer import TokenBuffer
+from engine.validator import ValidatorEngine
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.15
+STAGES = ("lexer", "parser", "validate_query")
+
+
+def run_lexer(family, prepared):
+    for text in family.texts:
+        for _ in RegexLexer(text).iter_tokens():
+            pass
+
+
+def run_parser(family, prepared):
+    for tokens in prepared:
+        parser = Parser(tokens)
+        if family.script:
+            parser.parse_script()
+        else:
+            parser.parse()
+
+
+def run_validate(family, prepared):
+    for text in family.texts:
+        ValidatorEngine.validate_query(text, recover=family.script)
+
+
+RUNNERS = {"lexer": run_lexer, "parser": run_parser, "validate_query": run_validate}
+
+
+def measure(runner, family, prepared, repeat):
+    """Best wall time over `repeat` runs, then the tracemalloc peak of one more run."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner(family, prepared)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    runner(family, prepared)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(seed=1, scale=1.0, repeat=3, stages=STAGES):
+    """Returns {"meta": ..., "results": {family: {stage: metrics}}}."""
+    results = {}
+    for family in generate_corpus(seed, scale):
+        # the parser stage starts from already lexed tokens
+        prepared = [TokenBuffer.from_lexer(RegexLexer(text))[0] for text in family.texts]
+        tokens = sum(len(buffer) for buffer in prepared)
+        megabytes = family.size_bytes / 1_000_000
+
+        results[family.name] = {}
+        for stage in stages:
+            seconds, peak = measure(RUNNERS[stage], family, prepared, repeat)
+            results[family.name][stage] = {
+                "seconds": round(seconds, 6),
+                "stmts_per_sec": round(family.statements / seconds, 1),
+                "tokens_per_sec": round(tokens / seconds, 1),
+                "mb_per_sec": round(megabytes / seconds, 3),
+                "peak_kb": round(peak / 1024, 1),
+            }
+
+    meta = {
+        "seed": seed,
+        "scale": scale,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+    return {"meta": meta, "results": results}
+
+
+def find_regressions(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares a run with a baseline run over the same corpus. A stage regresses
+    when its statements/sec drop, or its peak memory grows, by more than `threshold`.
+    """
+    if (report["meta"]["seed"], report["meta"]["scale"]) != (baseline["meta"]["seed"], baseline["meta"]["scale"]):
+        raise ValueError("Baseline was recorded with a different --seed/--scale, re-record it first")
+
+    regressions = []
+    for family, stages in report["results"].items():
+        for stage, metrics in stages.items():
+            base = baseline["results"].get(family, {}).get(stage)
+            if base is None:
+                continue
+            if metrics["stmts_per_sec"] < base["stmts_per_sec"] * (1 - threshold):
+                regressions.append(
+                    f"{family}/{stage}: {metrics['stmts_per_sec']:,.0f} stmts/s "
+                    f"vs baseline {base['stmts_per_sec']:,.0f}")
+            if metrics["peak_kb"] > base["peak_kb"] * (1 + threshold):
+                regressions.append(
+                    f"{family}/{stage}: peak {metrics['peak_kb']:,.0f} KB "
+                    f"vs baseline {base['peak_kb']:,.0f} KB")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'FAMILY':<18} {'STAGE':<15} {'STMTS/S':>12} {'TOKENS/S':>14} {'MB/S':>9} {'PEAK KB':>10}")
+    print("-" * 82)
+    for family, stages in report["results"].items():
+        for stage, m in stages.items():
+            print(f"{family:<18} {stage:<15} {m['stmts_per_sec']:>12,.0f} {m['tokens_per_sec']:>14,.0f} "
+                  f"{m['mb_per_sec']:>9.2f} {m['peak_kb']:>10,.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQL validator throughput benchmarks")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the corpus size")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, the best one counts")
+    parser.add_argument("--stage", choices=STAGES, action="append", help="only run these stages")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a stage regresses past --threshold")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--json", type=Path, help="also write this run's results here")
+    args = parser.parse_args(argv)
+
+    # error records from the engine are not part of the measurement
+    logging.getLogger("SQLValidator").setLevel(logging.CRITICAL)
+
+    report = run_benchmarks(args.seed, args.scale, args.repeat, tuple(args.stage or STAGES))
+    print_report(report)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            print(f"\nNo baseline at {args.baseline}, run with --save-baseline first")
+            return 2
+        regressions = find_regressions(report, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print(f"\nREGRESSIONS (threshold {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Seeded synthetic SQL corpus for the benchmarks. Every generated statement is
+valid for the engine's grammar, so the numbers measure the happy path end to end.
+"""
+import random
+
+TABLES = ["users", "orders", "items", "payments", "accounts", "sessions", "events", "staff"]
+COLUMNS = ["id", "name", "email", "status", "amount", "created_at", "owner_id", "total", "qty", "note"]
+OPERATORS = ["=", "!=", "<", ">", "<=", ">="]
+
+# statements per family at scale 1.0
+FAMILY_SIZES = {
+    "oltp": 5000,
+    "nested_subqueries": 200,
+    "giant_inserts": 40,
+    "long_strings": 200,
+    "scripts": 20,
+    "dump_inserts": 20,
+    "in_lists": 100,
+}
+
+
+class Family:
+    """One workload: its texts, how many statements they hold, and whether they are multi-statement scripts."""
+    __slots__ = ("name", "texts", "statements", "script")
+
+    def __init__(self, name, texts, statements, script=False):
+        self.name = name
+        self.texts = texts
+        self.statements = statements
+        self.script = script
+
+    @property
+    def size_bytes(self):
+        return sum(len(text.encode("utf-8")) for text in self.texts)
+
+
+def _literal(rng):
+    roll = rng.random()
+    if roll < 0.45:
+        return str(rng.randint(0, 100_000))
+    if roll < 0.6:
+        return f"{rng.randint(0, 9999)}.{rng.randint(0, 99)}"
+    if roll < 0.9:
+        return "'" + rng.choice(COLUMNS) + str(rng.randint(0, 999)) + "'"
+    return rng.choice(["?", ":" + rng.choice(COLUMNS), "$" + str(rng.randint(1, 9))])
+
+
+def _predicate(rng):
+    return f"{rng.choice(COLUMNS)} {rng.choice(OPERATORS)} {_literal(rng)}"
+
+
+def oltp_statement(rng):
+    """A short point query or single-row write, the bulk of real application traffic."""
+    kind = rng.random()
+    table = rng.choice(TABLES)
+    if kind < 0.55:
+        columns = ", ".join(rng.sample(COLUMNS, rng.randint(1, 5)))
+        sql = f"SELECT {columns} FROM {table}"
+        if rng.random() < 0.2:
+            other = rng.choice(TABLES)
+            sql += f" JOIN {other} ON owner_id = id"
+        if rng.random() < 0.8:
+            sql += f" WHERE {_predicate(rng)}"
+        if rng.random() < 0.2:
+            sql += f" ORDER BY {rng.choice(COLUMNS)} {rng.choice(['ASC', 'DESC'])}"
+        if rng.random() < 0.3:
+            sql += f" LIMIT {rng.randint(1, 100)}"
+        return sql + ";"
+    if kind < 0.75:
+        return f"UPDATE {table} SET {rng.choice(COLUMNS)} = {_literal(rng)} WHERE {_predicate(rng)};"
+    if kind < 0.9:
+        columns = rng.sample(COLUMNS, rng.randint(1, 6))
+        values = ", ".join(_literal(rng) for _ in columns)
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values});"
+    return f"DELETE FROM {table} WHERE {_predicate(rng)};"
+
+
+def nested_statement(rng, depth):
+    """SELECT ... WHERE col = (SELECT ... WHERE col = (...)) nested `depth` levels deep."""
+    sql = f"SELECT {rng.choice(COLUMNS)} FROM {rng.choice(TABLES)} WHERE {_predicate(rng)}"
+    for _ in range(depth):
+        sql = f"SELECT {rng.choice(COLUMNS)} FROM {rng.choice(TABLES)} WHERE {rng.choice(COLUMNS)} = ({sql})"
+    return sql + ";"
+
+
+def giant_insert(rng, values):
+    """One INSERT carrying a `values`-long literal list."""
+    columns = ", ".join(f"c{i}" for i in range(values))
+    literals = ", ".join(_literal(rng) for _ in range(values))
+    return f"INSERT INTO {rng.choice(TABLES)} ({columns}) VALUES ({literals});"
+
+
+def dump_insert(rng, rows):
+    """A mysqldump-style INSERT: `rows` tuples of a few literals each."""
+    columns = rng.sample(COLUMNS, rng.randint(3, 6))
+    tuples = ", ".join("(" + ", ".join(_literal(rng) for _ in columns) + ")" for _ in range(rows))
+    return f"INSERT INTO {rng.choice(TABLES)} ({', '.join(columns)}) VALUES {tuples};"
+
+
+def in_list_statement(rng, ids):
+    """An ORM-style SELECT ... WHERE id IN (...) over `ids` numbers."""
+    numbers = ", ".join(str(rng.randint(1, 10**9)) for _ in range(ids))
+    return f"SELECT {rng.choice(COLUMNS)} FROM {rng.choice(TABLES)} WHERE id IN ({numbers});"
+
+
+def long_string_statement(rng, length):
+    """A statement dominated by one long string literal."""
+    body = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ,.-") for _ in range(length))
+    return f"SELECT note FROM {rng.choice(TABLES)} WHERE note = '{body}';"
+
+
+def script(rng, statements):
+    """A migration-style script: many statements, spread over lines and indented."""
+    parts = []
+    for _ in range(statements):
+        words = oltp_statement(rng).split(" ")
+        lines, line = [], []
+        for word in words:
+            line.append(word)
+            if len(line) >= 4 and rng.random() < 0.4:
+                lines.append(" ".join(line))
+                line = []
+        if line:
+            lines.append(" ".join(line))
+        parts.append("\n    ".join(lines))
+    return "\n".join(parts) + "\n"
+
+
+def generate_corpus(seed=1, scale=1.0):
+    """Build every benchmark family from one seed; `scale` multiplies the statement counts."""
+    rng = random.Random(seed)
+
+    def count(family):
+        return max(1, int(FAMILY_SIZES[family] * scale))
+
+    oltp = [oltp_statement(rng) for _ in range(count("oltp"))]
+    nested = [nested_statement(rng, rng.randint(10, 40)) for _ in range(count("nested_subqueries"))]
+    inserts = [giant_insert(rng, rng.randint(1000, 3000)) for _ in range(count("giant_inserts"))]
+    strings = [long_string_statement(rng, rng.randint(4_000, 20_000)) for _ in range(count("long_strings"))]
+    scripts = [script(rng, 250) for _ in range(count("scripts"))]
+    dumps = [dump_insert(rng, rng.randint(2_000, 5_000)) for _ in range(count("dump_inserts"))]
+    in_lists = [in_list_statement(rng, rng.randint(1_000, 10_000)) for _ in range(count("in_lists"))]
+
+    return [
+        Family("oltp", oltp, len(oltp)),
+        Family("nested_subqueries", nested, len(nested)),
+        Family("giant_inserts", inserts, len(inserts)),
+        Family("long_strings", strings, len(strings)),
+        Family("scripts", scripts, 250 * len(scripts), script=True),
+        Family("dump_inserts", dumps, len(dumps)),
+        Family("in_lists", in_lists, len(in_lists)),
+    ]
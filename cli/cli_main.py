@@ -1,9 +1,12 @@
+import shlex
 import sys
+from collections import Counter
+from contextlib import ExitStack, nullcontext
 from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT_DIR))
 from datetime import datetime
-from utils.output_handler import OutputHandler
+from utils.output_handler import OutputHandler, OUTPUT_DIR, TextStreamWriter, NDJSONWriter, CSVStreamWriter
 
 from rich.console import Console
 from rich.panel import Panel
@@ -11,10 +14,18 @@ from rich.table import Table
 from rich.prompt import Prompt
 from rich import box
 from rich.markdown import Markdown
+from rich.markup import escape
 
 from utils.logger import setup_logger
-from utils.file_handler import FileHandler
-from engine.lexer import Lexer
+from utils.file_handler import FileHandler, MappedFile
+from utils.file_crawler import crawl, EMPTY, UNREADABLE, NO_MATCH
+from engine.lexer import Lexer, lexer_for
+from engine.token_buffer import TokenBuffer
+from engine.incremental import IncrementalLexer
+from engine.line_index import LineIndex
+from engine.cache import ResultCache
+from engine.disk_cache import PersistentCache
+from engine.profiling import ProfileSummary, RunProfiler, PROFILE_KINDS
 from engine.validator import ValidatorEngine
 from engine.exceptions import SQLError
 
@@ -64,7 +75,8 @@ def show_menu():
     menu_table.add_row("2", "Validate SQL from file(Enter file path)")
     menu_table.add_row("3", "Interactive SQL shell")
     menu_table.add_row("4", "validate fron file & Generate output files")
-    menu_table.add_row("5", "Exit")
+    menu_table.add_row("5", "Validate folders / glob patterns & Generate one merged report")
+    menu_table.add_row("6", "Exit")
 
 
     console.print(menu_table)
@@ -83,34 +95,70 @@ def show_tokens(tokens):
     console.print(Panel.fit("[bold green]✔ Lexing Successful[/bold green]", border_style="green"))
 
 
-def show_error(err: SQLError):
+def show_error(err: SQLError, line_index: LineIndex = None):
+    """line_index: of the text the error points into, to quote the offending line."""
+    source = ""
+    if line_index is not None and err.line is not None and err.line <= len(line_index):
+        excerpt, caret = line_index.excerpt(err.line, err.column)
+        source = f"Source : {escape(excerpt)}\n" + " " * (9 + caret) + "^\n"
     console.print(Panel.fit(
         f"[bold red]SQL ERROR[/bold red]\n\n"
         f"Message : {err.msg}\n"
         f"Location : Line {err.line}, Column {err.column}\n"
+        f"{source}"
         f"Hint : {err.detail}",
         border_style="red"
     ))
 
 # ---------------- CORE ENGINE CALL ---------------- #
 
-def run_lexer(source_input: str):
+def run_lexer(source_input: str, session: IncrementalLexer = None):
     raw_sql = FileHandler.read(source_input) if "." in source_input else source_input
     
     if not raw_sql:
         console.print(Panel.fit("[bold red]No content to validate[/bold red]", border_style="red"))
         return
 
-    result = ValidatorEngine.validate_query(raw_sql)
+    if isinstance(raw_sql, MappedFile):
+        run_mapped_file(raw_sql)
+        return
+
+    # Files and pasted scripts are checked in full, reporting every error in one go;
+    # a shell session only re-lexes and re-parses what changed since the last query
+    if session is not None:
+        session.update(raw_sql)
+        result = ValidatorEngine.validate_session(session)
+    else:
+        result = ValidatorEngine.validate_query(raw_sql, recover=True)
 
     if result["status"] == "INVALID":
-        err = result["error"]
-        show_error(SQLError(err["message"], err["line"], err["column"], err["hint"]))
+        line_index = session.tokens.line_index if session is not None else LineIndex(raw_sql)
+        for err in result["errors"]:
+            show_error(SQLError(err["message"], err["line"], err["column"], err["hint"]), line_index)
     else:
         show_tokens(result["tokens"])
         console.print(Panel.fit("[bold green]✔ SQL Grammar is Valid[/bold green]", border_style="green"))
 
 
+def run_mapped_file(mapped: MappedFile):
+    """Too big for a token table: validate statement by statement and report every error."""
+    count = 0
+    invalid = 0
+    for statement in mapped.iter_statements():
+        count += 1
+        result = ValidatorEngine.validate_query(statement.text, build_ast=False, recover=True)
+        if result["status"] == "INVALID":
+            invalid += 1
+            for err in result["errors"]:
+                line, column = statement.source_position(err["line"], err["column"])
+                show_error(SQLError(f"Statement {count}: {err['message']}", line, column, err["hint"]))
+
+    if invalid:
+        console.print(Panel.fit(f"[bold red]✘ {invalid} of {count} statements are invalid[/bold red]", border_style="red"))
+        return
+    console.print(Panel.fit(f"[bold green]✔ SQL Grammar is Valid[/bold green] ({count} statements)", border_style="green"))
+
+
 # ---------------- MENU ACTIONS ---------------- #
 
 def validate_from_text():
@@ -120,82 +168,186 @@ def validate_from_text():
 
 
 def validate_from_file():
-    console.print(Panel.fit("Enter file path (.txt or .json):", border_style="cyan"))
+    console.print(Panel.fit("Enter file path (.txt, .sql or .json):", border_style="cyan"))
     path = Prompt.ask("Path")
     run_lexer(path)
 
 
 def interactive_shell():
     console.print(Panel.fit("[bold cyan]Interactive SQL Shell[/bold cyan]\nType 'exit' to quit", border_style="cyan"))
+    session = IncrementalLexer()
     while True:
         query = Prompt.ask("SQL >")
         if query.lower() in ["exit", "quit"]:
             break
-        run_lexer(query)
+        run_lexer(query, session=session)
 
 
 
 def batch_validate_file():
     console.print(Panel.fit("[bold cyan]Batch SQL Validation[/bold cyan]", border_style="cyan"))
     
-    path = Prompt.ask("Enter input file path (.txt or .json)")
-    raw_content = FileHandler.read(path)
-    if not raw_content:
+    path = Prompt.ask("Enter input file path (.txt, .sql or .json)")
+    # Statements are split on ';' (outside quotes) while the file is read
+    statements = FileHandler.iter_statements(path)
+    if statements is None:
         console.print("[bold red]Failed to read input file[/bold red]")
         return
 
     base_name = Path(path).stem
     out_format = Prompt.ask("Format", choices=["txt", "json", "csv", "all"], default="all")
 
-    # Determine list of queries
-    queries = []
-    if isinstance(raw_content, str):
-        queries = [q.strip() for q in raw_content.splitlines() if q.strip()]
-    elif isinstance(raw_content, dict):
-        queries = raw_content.get("queries", [])
+    reuse = Prompt.ask("Reuse results from previous runs?", choices=["y", "n"], default="n")
+
+    # Results stay status-only so every statement goes through the cache; the TXT
+    # report re-lexes just the VALID statements whose tokens it lists
+    if reuse == "y":
+        cache = PersistentCache(OUTPUT_DIR / "validation_cache.sqlite")
+    else:
+        cache = ResultCache()
+
+    # timing: per-statement lex/parse times summarized into percentiles;
+    # cprofile / tracemalloc also dump the whole run to output/ (run serially, in this process)
+    profile_mode = Prompt.ask("Profile this run?", choices=["off", "timing", *PROFILE_KINDS], default="off")
+    summary = ProfileSummary() if profile_mode != "off" else None
 
     # CALL THE ENGINE
-    reports_txt = []
-    json_results = []
-    csv_summary = []
-
-    for idx, query in enumerate(queries, start=1):
-        result = ValidatorEngine.validate_query(query)
-        
-        # Build pretty TXT report ⭐
-        report_text = ValidatorEngine.build_text_report(result, query)
-        reports_txt.append(f"\n\n--- QUERY {idx} ---\n{report_text}")
-
-        # JSON summary
-        json_results.append({
-            "query_index": idx,
-            "query": query,
-            "status": result["status"]
-        })
-
-        # CSV summary
-        csv_summary.append({
-            "query_index": idx,
-            "query": query,
-            "status": result["status"]
-        })
-
-    # SAVE FILES
-    if out_format in ["txt", "all"]:
-        OutputHandler.save_txt(f"{base_name}_report.txt", "\n".join(reports_txt))
-
-    if out_format in ["json", "all"]:
-        OutputHandler.save_json(f"{base_name}_summary.json", json_results)
-
-    if out_format in ["csv", "all"]:
-        OutputHandler.save_csv(f"{base_name}_summary.csv", csv_summary)
-
-    valid_count = sum(1 for r in json_results if r["status"] == "VALID")
-    invalid_count = len(json_results) - valid_count
+    batch = ValidatorEngine.iter_batch(
+        statements, cache=cache,
+        profile=summary is not None, workers=1 if profile_mode in PROFILE_KINDS else None)
+    run_profiler = RunProfiler(profile_mode, OUTPUT_DIR, f"{base_name}_profile") if profile_mode in PROFILE_KINDS else nullcontext()
+
+    template_counts = Counter()
+    valid_count = invalid_count = 0
+
+    # Reports are streamed to disk as results come in, nothing is kept per query
+    with ExitStack() as reports, run_profiler:
+        txt_report = reports.enter_context(TextStreamWriter(f"{base_name}_report.txt")) if out_format in ["txt", "all"] else None
+        json_summary = reports.enter_context(NDJSONWriter(f"{base_name}_summary.ndjson")) if out_format in ["json", "all"] else None
+        csv_summary = reports.enter_context(CSVStreamWriter(f"{base_name}_summary.csv")) if out_format in ["csv", "all"] else None
+
+        for idx, (statement, result) in enumerate(batch, start=1):
+            query = statement.text
+            if summary is not None:
+                summary.add(result["profile"], query, idx)
+            if result.get("template"):
+                template_counts[result["template"]] += 1
+            if result["status"] == "VALID":
+                valid_count += 1
+            else:
+                invalid_count += 1
+
+            # Pretty TXT report ⭐
+            if txt_report is not None:
+                if result["status"] == "VALID":
+                    result = dict(result, tokens=TokenBuffer.from_lexer(lexer_for(query))[0])
+                report_text = ValidatorEngine.build_text_report(result, query)
+                txt_report.write(f"\n\n--- QUERY {idx} ---\n{report_text}")
+
+            row = {
+                "query_index": idx,
+                "line": statement.line,
+                "query": query,
+                "status": result["status"]
+            }
+            # JSON (one object per line) / CSV summary
+            if json_summary is not None:
+                json_summary.write(row)
+            if csv_summary is not None:
+                csv_summary.write(row)
+
+    if reuse == "y":
+        cache.close()
+
+    if summary is not None:
+        OutputHandler.save_json(f"{base_name}_profile.json", summary.to_dict())
+        if getattr(run_profiler, "path", None):
+            console.print(f"[Saved {profile_mode}] {run_profiler.path}")
+        console.print(Panel.fit(summary.format_text(), title="Profile", border_style="cyan"))
+
+    console.print(Panel.fit(
+        f"[bold green]Batch Complete![/bold green]\nValid: {valid_count} | Invalid: {invalid_count}\n"
+        f"Cache : {cache.hits} hits | {cache.misses} misses | {cache.evictions} evictions\n"
+        f"Distinct templates : {len(template_counts)}",
+        border_style="green"))
+
+
+def crawl_validate_files():
+    console.print(Panel.fit("[bold cyan]Multi-file SQL Validation[/bold cyan]", border_style="cyan"))
+
+    patterns = shlex.split(Prompt.ask("Directories, files or glob patterns (e.g. migrations **/*.sql)"))
+    if not patterns:
+        console.print("[bold red]Nothing to validate[/bold red]")
+        return
+    out_format = Prompt.ask("Format", choices=["txt", "json", "csv", "all"], default="all")
+    base_name = f"crawl_{datetime.now():%Y%m%d_%H%M%S}"
+
+    totals = Counter()
+    unreadable = []
+    unmatched = []          # directories and globs that gave no file
+    current = None          # per-file row being counted (records come file by file)
+
+    # One merged report: a record per statement, plus a row per file
+    with ExitStack() as reports:
+        txt_report = reports.enter_context(TextStreamWriter(f"{base_name}_report.txt")) if out_format in ["txt", "all"] else None
+        json_report = reports.enter_context(NDJSONWriter(f"{base_name}_report.ndjson")) if out_format in ["json", "all"] else None
+        csv_report = reports.enter_context(CSVStreamWriter(f"{base_name}_report.csv")) if out_format in ["csv", "all"] else None
+        file_rows = reports.enter_context(CSVStreamWriter(f"{base_name}_files.csv"))
+
+        for record in crawl(patterns):
+            if current is not None and current["file"] != record["file"]:
+                file_rows.write(current)
+                current = None
+
+            if record["status"] == NO_MATCH:
+                unmatched.append(record["file"])
+                continue
+            if record["status"] in (EMPTY, UNREADABLE):
+                totals[record["status"]] += 1
+                if record["status"] == UNREADABLE:
+                    unreadable.append(record["file"])
+                file_rows.write({"file": record["file"], "statements": 0, "valid": 0, "invalid": 0, "status": record["status"]})
+                continue
+
+            if current is None:
+                totals["files"] += 1
+                current = {"file": record["file"], "statements": 0, "valid": 0, "invalid": 0, "status": "VALID"}
+            current["statements"] += 1
+            if record["status"] == "VALID":
+                current["valid"] += 1
+            else:
+                current["invalid"] += 1
+                current["status"] = "INVALID"
+                if txt_report is not None:
+                    txt_report.write(f"{record['file']}:{record['line']}:{record['column']}: "
+                                     f"{record['phase']} error: {record['message']}")
+            totals[record["status"]] += 1
+
+            if json_report is not None:
+                json_report.write(record)
+            if csv_report is not None:
+                csv_report.write(record)
+
+        if current is not None:
+            file_rows.write(current)
+
+    OutputHandler.save_json(f"{base_name}_summary.json", {
+        "patterns": patterns,
+        "files": totals["files"],
+        "empty_files": totals[EMPTY],
+        "unreadable_files": unreadable,
+        "unmatched_patterns": unmatched,
+        "statements": totals["VALID"] + totals["INVALID"],
+        "valid": totals["VALID"],
+        "invalid": totals["INVALID"],
+    })
 
     console.print(Panel.fit(
-        f"[bold green]Batch Complete![/bold green]\nValid: {valid_count} | Invalid: {invalid_count}",
+        f"[bold green]Crawl Complete![/bold green]\nFiles: {totals['files']} | Empty: {totals[EMPTY]} | Unreadable: {len(unreadable)}\n"
+        f"Valid: {totals['VALID']} | Invalid: {totals['INVALID']}",
         border_style="green"))
+    for pattern in unmatched:
+        console.print(f"[bold yellow]No files match {pattern}[/bold yellow]")
 
 
 # ---------------- MAIN APP LOOP ---------------- #
@@ -205,7 +357,7 @@ def main():
 
     while True:
         show_menu()
-        choice = Prompt.ask("Select option", choices=["1","2","3","4","5"])
+        choice = Prompt.ask("Select option", choices=["1","2","3","4","5","6"])
 
         if choice == "1":
             validate_from_text()
@@ -216,6 +368,8 @@ def main():
         elif choice == "4":
             batch_validate_file()
         elif choice == "5":
+            crawl_validate_files()
+        elif choice == "6":
             console.print(Panel.fit("[bold green]Goodbye 👋[/bold green]", border_style="green"))
             break  # <<< THIS IS THE KEY: stop the loop
 
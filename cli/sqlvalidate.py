@@ -0,0 +1,168 @@
+"""
+Headless validator for scripts, CI jobs and pre-commit hooks.
+
+    python cli/sqlvalidate.py FILE... [--format txt|json|csv] [--output PATH] [--fail-on-invalid]
+
+FILE may be .sql / .txt / .json, a directory (searched recursively for those),
+a glob pattern such as 'migrations/**/*.sql', or - for stdin. Files are read on
+a thread pool and validated on worker processes (see utils.file_crawler).
+Every statement gets a record (file, statement index, line, column, status,
+phase, message, hint); txt only lists the invalid ones, compiler style
+(file:line:column: ...).
+
+Exit codes: 0 done (or everything valid), 1 invalid SQL found and --fail-on-invalid
+set, 2 bad usage, an input that can't be read or a report cut short by a closed pipe.
+
+Only the engine and the file crawler are imported at start-up; no rich, no menu, no output/ folder.
+The json / csv writers are imported when that format is asked for.
+"""
+import argparse
+import itertools
+import logging
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from engine.splitter import split_statements
+from engine.validator import ValidatorEngine
+from utils.file_crawler import crawl, statement_record, FIELDS, EMPTY, UNREADABLE, NO_MATCH, DEFAULT_READ_THREADS
+
+EXIT_OK = 0
+EXIT_INVALID = 1
+EXIT_ERROR = 2
+
+
+def iter_stdin_records(workers=None):
+    """One record per statement read from stdin."""
+    # read as bytes: ASCII input is lexed without being decoded (statement text is never shown)
+    batch = ValidatorEngine.iter_batch(split_statements(sys.stdin.buffer), workers=workers)
+    index = 0
+    for index, (statement, result) in enumerate(batch, start=1):
+        yield statement_record("-", index, statement, result)
+    if not index:
+        yield dict(dict.fromkeys(FIELDS), file="-", status=EMPTY)
+
+
+def iter_records(paths, workers=None, threads=DEFAULT_READ_THREADS):
+    """Records of every input in command line order; runs of file arguments are crawled together."""
+    for stdin, group in itertools.groupby(paths, key=lambda path: path == "-"):
+        if stdin:
+            for _ in group:
+                yield from iter_stdin_records(workers)
+        else:
+            yield from crawl(list(group), workers=workers, threads=threads)
+
+
+class TextWriter:
+    """file:line:column: PHASE error: message -- one line per invalid statement."""
+    def __init__(self, out, quiet=False):
+        self.out = out
+        self.quiet = quiet
+
+    def write(self, record):
+        if record["status"] == "INVALID":
+            self.out.write(f"{record['file']}:{record['line']}:{record['column']}: "
+                           f"{record['phase']} error: {record['message']}\n")
+
+    def close(self, checked, invalid, files):
+        if not self.quiet:
+            self.out.write(f"Checked {checked} statements in {files} file(s): {invalid} invalid\n")
+
+
+class JsonWriter:
+    """A JSON array of records, written as they come."""
+    def __init__(self, out, quiet=False):
+        import json
+        self._dumps = json.dumps
+        self.out = out
+        self.first = True
+        out.write("[")
+
+    def write(self, record):
+        self.out.write(("\n  " if self.first else ",\n  ") + self._dumps(record))
+        self.first = False
+
+    def close(self, checked, invalid, files):
+        self.out.write("\n]\n" if not self.first else "]\n")
+
+
+class CsvWriter:
+    def __init__(self, out, quiet=False):
+        import csv
+        self.writer = csv.DictWriter(out, fieldnames=FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        self.writer.writerow(record)
+
+    def close(self, checked, invalid, files):
+        pass
+
+
+WRITERS = {"txt": TextWriter, "json": JsonWriter, "csv": CsvWriter}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="sqlvalidate", description="Validate SQL files without the interactive menu")
+    parser.add_argument("files", nargs="+", metavar="FILE", help=".sql / .txt / .json file, directory, glob pattern, or - for stdin")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="txt")
+    parser.add_argument("--output", "-o", help="write the report here instead of stdout")
+    parser.add_argument("--fail-on-invalid", action="store_true", help="exit 1 when any statement is invalid")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_READ_THREADS, help="threads reading files ahead of the validation")
+    parser.add_argument("--quiet", "-q", action="store_true", help="txt: no summary line")
+    parser.add_argument("--verbose", "-v", action="store_true", help="show the engine's log on stderr")
+    args = parser.parse_args(argv)
+
+    engine_log = logging.getLogger("SQLValidator")
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    else:
+        # the engine logs every invalid statement, the report already has them
+        engine_log.addHandler(logging.NullHandler())
+        engine_log.propagate = False
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    writer = WRITERS[args.format](out, quiet=args.quiet)
+    checked = invalid = files = 0
+    status = EXIT_OK
+
+    try:
+        for record in iter_records(args.files, args.jobs, args.threads):
+            if record["status"] == UNREADABLE:
+                print(f"sqlvalidate: cannot read {record['file']}", file=sys.stderr)
+                status = EXIT_ERROR
+                continue
+            if record["status"] == NO_MATCH:
+                print(f"sqlvalidate: no files match {record['file']}", file=sys.stderr)
+                status = EXIT_ERROR
+                continue
+            if record["status"] == EMPTY:
+                files += 1
+                continue
+            if record["statement"] == 1:
+                files += 1
+            checked += 1
+            if record["status"] == "INVALID":
+                invalid += 1
+            writer.write(record)
+        writer.close(checked, invalid, files)
+    except BrokenPipeError:
+        # report piped into head & co.: point stdout at devnull so the interpreter's
+        # final flush can't fail again, and don't pass a cut-short run off as clean
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        status = EXIT_ERROR
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if status == EXIT_OK and invalid and args.fail_on_invalid:
+        status = EXIT_INVALID
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
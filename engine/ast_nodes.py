@@ -0,0 +1,196 @@
+class Node:
+    """
+    Base for the parser's AST nodes. Nodes are plain __slots__ records.
+    to_dict, repr and == walk the tree with an explicit stack: subqueries nest
+    as deep as the parser allows, far past Python's recursion limit.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        """Nested dict/list form of the tree, ready for json.dump."""
+        root = {}
+        pending = [(self, root)]    # nodes whose dict is still empty
+        while pending:
+            node, data = pending.pop()
+            data["node"] = type(node).__name__
+            for name in type(node).__slots__:
+                data[name] = _plain(getattr(node, name), pending)
+        return root
+
+    def __repr__(self):
+        parts = []
+        stack = [(False, self)]     # (is_text, item), popped from the end
+        while stack:
+            is_text, item = stack.pop()
+            if is_text:
+                parts.append(item)
+            elif isinstance(item, Node):
+                todo = [(True, type(item).__name__ + "(")]
+                for i, name in enumerate(type(item).__slots__):
+                    todo.append((True, f", {name}=" if i else f"{name}="))
+                    todo.append((False, getattr(item, name)))
+                todo.append((True, ")"))
+                stack.extend(reversed(todo))
+            elif isinstance(item, list):
+                todo = [(True, "[")]
+                for i, element in enumerate(item):
+                    if i:
+                        todo.append((True, ", "))
+                    todo.append((False, element))
+                todo.append((True, "]"))
+                stack.extend(reversed(todo))
+            else:
+                parts.append(repr(item))
+        return "".join(parts)
+
+    def __eq__(self, other):
+        pairs = [(self, other)]
+        while pairs:
+            mine, theirs = pairs.pop()
+            if isinstance(mine, Node):
+                if type(mine) is not type(theirs):
+                    return False
+                pairs.extend((getattr(mine, name), getattr(theirs, name)) for name in type(mine).__slots__)
+            elif isinstance(mine, list):
+                if not isinstance(theirs, list) or len(mine) != len(theirs):
+                    return False
+                pairs.extend(zip(mine, theirs))
+            elif mine != theirs:
+                return False
+        return True
+
+
+def _plain(value, pending):
+    """JSON-ready form of a field; a nested node gets an empty dict, queued on `pending` to fill."""
+    if isinstance(value, Node):
+        data = {}
+        pending.append((value, data))
+        return data
+    if isinstance(value, list):
+        return [_plain(item, pending) for item in value]
+    if hasattr(value, "name"):              # TokenType
+        return value.name
+    return value
+
+
+# ---------- Statements ----------
+
+class Select(Node):
+    __slots__ = ("columns", "table", "joins", "where", "group_by", "having", "order_by", "limit")
+
+    def __init__(self, columns, table, where=None, joins=None, group_by=None, having=None,
+                 order_by=None, limit=None):
+        self.columns = columns      # column names, or ["*"]
+        self.table = table
+        self.joins = joins or []
+        self.where = where
+        self.group_by = group_by or []
+        self.having = having
+        self.order_by = order_by or []
+        self.limit = limit
+
+
+class Insert(Node):
+    """INSERT INTO table (columns) VALUES (...), (...) -- the rows are only counted"""
+    __slots__ = ("table", "columns", "row_count", "value_count")
+
+    def __init__(self, table, columns, row_count, value_count):
+        self.table = table
+        self.columns = columns
+        self.row_count = row_count          # VALUES tuples
+        self.value_count = value_count      # literals over all the tuples
+
+
+class Update(Node):
+    __slots__ = ("table", "assignments", "where")
+
+    def __init__(self, table, assignments, where=None):
+        self.table = table
+        self.assignments = assignments
+        self.where = where
+
+
+class Delete(Node):
+    __slots__ = ("table", "where")
+
+    def __init__(self, table, where=None):
+        self.table = table
+        self.where = where
+
+
+# ---------- Clauses & expressions ----------
+
+class Assignment(Node):
+    __slots__ = ("column", "value")
+
+    def __init__(self, column, value):
+        self.column = column
+        self.value = value
+
+
+class Comparison(Node):
+    """WHERE column <op> value"""
+    __slots__ = ("column", "operator", "value")
+
+    def __init__(self, column, operator, value):
+        self.column = column
+        self.operator = operator    # operator text, e.g. '>='
+        self.value = value
+
+
+class InPredicate(Node):
+    """WHERE column IN (value / subquery)  |  WHERE column IN (value, value, ...)"""
+    __slots__ = ("column", "value")
+
+    def __init__(self, column, value):
+        self.column = column
+        self.value = value          # the single value node, or a ValueList
+
+
+class ValueList(Node):
+    """A list of two or more IN values, kept as its length only"""
+    __slots__ = ("count",)
+
+    def __init__(self, count):
+        self.count = count
+
+
+class Join(Node):
+    """JOIN table ON left <op> right"""
+    __slots__ = ("table", "left", "operator", "right")
+
+    def __init__(self, table, left, operator, right):
+        self.table = table
+        self.left = left
+        self.operator = operator
+        self.right = right
+
+
+class OrderItem(Node):
+    __slots__ = ("column", "direction")
+
+    def __init__(self, column, direction=None):
+        self.column = column
+        self.direction = direction  # "ASC", "DESC" or None
+
+
+class Literal(Node):
+    __slots__ = ("kind", "value")
+
+    def __init__(self, kind, value):
+        self.kind = kind            # TokenType.STRING / NUMBER / PLACEHOLDER
+        self.value = value
+
+
+class ColumnRef(Node):
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Subquery(Node):
+    __slots__ = ("select",)
+
+    def __init__(self, select):
+        self.select = select
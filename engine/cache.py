@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+try:
+    # hashlib would load OpenSSL as well (~4 ms of a cold start) for a hash it
+    # takes from _blake2 anyway
+    from _blake2 import blake2b
+except ImportError:
+    from hashlib import blake2b
+
+DEFAULT_CACHE_SIZE = 100_000
+
+
+def query_hash(sql_text):
+    """
+    128-bit digest of the exact query text, used as the cache key. A bytes-like
+    query is hashed as is, so it shares its key with the same text as a str.
+    """
+    if isinstance(sql_text, str):
+        sql_text = sql_text.encode("utf-8", "surrogatepass")
+    return blake2b(sql_text, digest_size=16).digest()
+
+
+class ResultCache:
+    """
+    Bounded in-process LRU cache of compact validation results, keyed on query_hash.
+    Only status-level results are stored (no Token lists), so a full cache stays small.
+    """
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"ResultCache({len(self)}/{self.max_size}, hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path("output") / "validation_cache.sqlite"
+
+# Every engine module is part of the stamp: statuses, errors and positions depend
+# on more than the grammar (token stream, buffer, line index, prescan, ...)
+ENGINE_DIR = Path(__file__).resolve().parent
+
+
+def engine_version():
+    """Stamp built from all engine/*.py sources, so editing any of them invalidates the cache."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(ENGINE_DIR.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class PersistentCache:
+    """
+    On-disk validation cache (SQLite) that survives between runs.
+    Same get/put interface as ResultCache, keyed on query_hash, so it can be handed
+    to ValidatorEngine.iter_batch and only new or changed statements get parsed.
+    Results stored under another engine version are dropped when the file is opened.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, version=None, commit_every=1000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.version = version or engine_version()
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending = {}
+
+        self._db = sqlite3.connect(str(self.path))
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, result TEXT)")
+
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != self.version:
+            # Engine changed since these results were written: never serve them
+            self._db.execute("DELETE FROM results")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self.version,))
+        self._db.commit()
+
+    def get(self, key):
+        result = self._pending.get(key)
+        if result is None:
+            row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            result = json.loads(row[0]) if row is not None else None
+
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self._pending[key] = result
+        if len(self._pending) >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered results to disk in one transaction."""
+        if not self._pending:
+            return
+        self._db.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?)",
+            [(key, json.dumps(result)) for key, result in self._pending.items()]
+        )
+        self._db.commit()
+        self._pending.clear()
+
+    def clear(self):
+        self._pending.clear()
+        self._db.execute("DELETE FROM results")
+        self._db.commit()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] + len(self._pending)
+
+    def __repr__(self):
+        return f"PersistentCache({self.path}, hits={self.hits}, misses={self.misses})"
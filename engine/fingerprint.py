@@ -0,0 +1,49 @@
+from engine.tokens import TokenType
+from engine.lexer import lexer_for
+from engine.token_buffer import TokenBuffer, TYPE_CODES
+
+# Each literal becomes a '?' mark that keeps its kind: the grammar does not take
+# them interchangeably everywhere (LIMIT only takes a NUMBER), so "LIMIT 5" and
+# "LIMIT 'x'" must not share a template
+LITERAL_MARKS = {
+    TokenType.NUMBER: "?n",
+    TokenType.STRING: "?s",
+    TokenType.PLACEHOLDER: "?p",
+}
+MARKS_BY_CODE = {TYPE_CODES[t]: mark for t, mark in LITERAL_MARKS.items()}
+BYTE_MARKS_BY_CODE = {code: mark.encode("ascii") for code, mark in MARKS_BY_CODE.items()}
+IDENTIFIER_CODE = TYPE_CODES[TokenType.IDENTIFIER]
+EOF_CODE = TYPE_CODES[TokenType.EOF]
+
+
+def fingerprint(sql_text):
+    """
+    Normalizes a statement to its template: each literal becomes a mark of its
+    kind (?n number, ?s string, ?p placeholder), keywords are upper-cased and
+    tokens are joined by single spaces, so "select * from t where id = 1" and
+    "SELECT *  FROM t WHERE id = 42" share "SELECT * FROM t WHERE id = ?n".
+    Returns (template, TokenBuffer), or (None, SQLError) when the text doesn't lex.
+    """
+    tokens, error = TokenBuffer.from_lexer(lexer_for(sql_text))
+    if error is not None:
+        return None, error
+
+    source = tokens.source
+    if isinstance(source, str):
+        space, marks = " ", MARKS_BY_CODE
+    else:
+        # ASCII bytes input: the template is built as bytes and decoded once
+        space, marks = b" ", BYTE_MARKS_BY_CODE
+        if not isinstance(source, bytes):
+            source = bytes(source)
+    parts = []
+    for code, start, end in zip(tokens.types, tokens.starts, tokens.ends):
+        if code in marks:
+            parts.append(marks[code])
+        elif code == IDENTIFIER_CODE:
+            parts.append(source[start:end])
+        elif code != EOF_CODE:
+            parts.append(source[start:end].upper())
+
+    template = space.join(parts)
+    return (template if isinstance(template, str) else template.decode("ascii")), tokens
@@ -0,0 +1,140 @@
+from engine.tokens import TokenType as T
+
+# Declarative description of the grammar the Parser accepts.
+# A rule is a list of alternatives, an alternative is a sequence of symbols:
+#   TokenType        -> a terminal
+#   "name"           -> another rule
+#   Opt(x) / Many(x) -> x is optional / x may repeat zero or more times
+# The Parser doesn't walk this structure token by token; FIRST sets and the
+# dispatch tables below are computed from it once at import time, so adding a
+# rule only adds a dict entry and never slows down the common path.
+
+
+class Opt:
+    __slots__ = ("symbol",)
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+
+class Many:
+    __slots__ = ("symbol",)
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+
+GRAMMAR = {
+    # A script is statements separated by ';' (Parser.parse_script): a ';' always
+    # ends a statement, it is never part of one (not even inside a subquery)
+    "statement": [["select_stmt"], ["insert_stmt"], ["update_stmt"], ["delete_stmt"]],
+
+    # ---------- Statements ----------
+    "select_stmt": [[T.SELECT, "select_list", T.FROM, T.IDENTIFIER, "select_tail"]],
+    "select_list": [[T.ASTERISK], [T.IDENTIFIER, Many("more_columns")]],
+    "more_columns": [[T.COMMA, T.IDENTIFIER]],
+    # Optional clauses, in the order they must appear
+    "select_tail": [[Many("join_clause"), Opt("where_clause"), Opt("group_by_clause"),
+                     Opt("having_clause"), Opt("order_by_clause"), Opt("limit_clause")]],
+
+    "insert_stmt": [[T.INSERT, T.INTO, T.IDENTIFIER, T.LPAREN, T.IDENTIFIER, Many("more_columns"), T.RPAREN,
+                     T.VALUES, "values_row", Many("more_rows")]],
+    "values_row": [[T.LPAREN, "literal", Many("more_literals"), T.RPAREN]],
+    "more_rows": [[T.COMMA, "values_row"]],
+    "more_literals": [[T.COMMA, "literal"]],
+
+    "update_stmt": [[T.UPDATE, T.IDENTIFIER, T.SET, T.IDENTIFIER, T.EQUALS, "literal",
+                     Opt("where_clause")]],
+
+    "delete_stmt": [[T.DELETE, T.FROM, T.IDENTIFIER, Opt("where_clause")]],
+
+    # ---------- Clauses ----------
+    "join_clause": [[T.JOIN, T.IDENTIFIER, T.ON, T.IDENTIFIER, "comparison_op", T.IDENTIFIER]],
+    "where_clause": [[T.WHERE, "predicate"]],
+    "group_by_clause": [[T.GROUP, T.BY, T.IDENTIFIER, Many("more_columns")]],
+    "having_clause": [[T.HAVING, "predicate"]],
+    "order_by_clause": [[T.ORDER, T.BY, "order_item", Many("more_order_items")]],
+    "order_item": [[T.IDENTIFIER, Opt("direction")]],
+    "more_order_items": [[T.COMMA, "order_item"]],
+    "direction": [[T.ASC], [T.DESC]],
+    "limit_clause": [[T.LIMIT, T.NUMBER]],
+
+    # ---------- Expressions ----------
+    "predicate": [[T.IDENTIFIER, "comparison_op", "value"],
+                  [T.IDENTIFIER, T.IN, T.LPAREN, "value", Many("more_values"), T.RPAREN]],
+    "more_values": [[T.COMMA, "value"]],
+    "comparison_op": [[T.EQUALS], [T.NOT_EQUALS], [T.LESS], [T.LESS_EQUALS], [T.GREATER], [T.GREATER_EQUALS]],
+    "value": [["literal"], [T.IDENTIFIER], ["subquery"]],
+    "subquery": [[T.LPAREN, "select_stmt", T.RPAREN]],
+    "literal": [[T.STRING], [T.NUMBER], [T.PLACEHOLDER]],
+}
+
+
+def compute_first_sets(grammar):
+    """Classic fixed point: FIRST set and nullability of every rule."""
+    first = {name: set() for name in grammar}
+    nullable = {name: False for name in grammar}
+
+    def symbol_first(symbol):
+        """(FIRST, nullable) of a single symbol with the current approximation."""
+        if isinstance(symbol, (Opt, Many)):
+            inner, _ = symbol_first(symbol.symbol)
+            return inner, True
+        if isinstance(symbol, str):
+            return first[symbol], nullable[symbol]
+        return {symbol}, False
+
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.items():
+            for sequence in alternatives:
+                seq_first, seq_nullable = sequence_first(sequence, symbol_first)
+                if not seq_first <= first[name]:
+                    first[name] |= seq_first
+                    changed = True
+                if seq_nullable and not nullable[name]:
+                    nullable[name] = True
+                    changed = True
+
+    return {name: frozenset(tokens) for name, tokens in first.items()}, nullable
+
+
+def sequence_first(sequence, symbol_first):
+    result = set()
+    for symbol in sequence:
+        tokens, is_nullable = symbol_first(symbol)
+        result |= tokens
+        if not is_nullable:
+            return result, False
+    return result, True
+
+
+FIRST, NULLABLE = compute_first_sets(GRAMMAR)
+
+
+def _statement_dispatch():
+    """Statement start token -> statement rule name."""
+    table = {}
+    for (rule,) in GRAMMAR["statement"]:
+        for token_type in FIRST[rule]:
+            table[token_type] = rule
+    return table
+
+
+def _select_clause_dispatch():
+    """Clause start token -> (rank, rule name, may repeat) for the optional SELECT clauses."""
+    table = {}
+    for rank, symbol in enumerate(GRAMMAR["select_tail"][0]):
+        for token_type in FIRST[symbol.symbol]:
+            table[token_type] = (rank, symbol.symbol, isinstance(symbol, Many))
+    return table
+
+
+STATEMENT_DISPATCH = _statement_dispatch()
+SELECT_CLAUSES = _select_clause_dispatch()
+
+COMPARISON_OPERATORS = FIRST["comparison_op"]
+LITERAL_TYPES = FIRST["literal"]
+VALUE_TYPES = FIRST["value"] - FIRST["subquery"]      # plain values, no subquery
+ORDER_DIRECTIONS = FIRST["direction"]
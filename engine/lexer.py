@@ -1,16 +1,39 @@
 import logging
+import re
 from engine.tokens import TokenType, KEYWORDS
 from engine.exceptions import SQLError
+from engine.line_index import LineIndex
 
 logger = logging.getLogger("SQLValidator")
 
 class Token:
-    """The Individual unit produced by the Lexer."""
-    def __init__(self, type, value, line, column):
+    """
+    The Individual unit produced by the Lexer.
+    It only records the source offset it is reported at; line and column are
+    looked up in the input's LineIndex when they are read.
+    """
+    __slots__ = ("type", "value", "offset", "line_index")
+
+    def __init__(self, type, value, offset, line_index):
         self.type = type
         self.value = value
-        self.line = line
-        self.column = column
+        self.offset = offset
+        self.line_index = line_index
+
+    @property
+    def line(self):
+        return self.position[0]
+
+    @property
+    def column(self):
+        return self.position[1]
+
+    @property
+    def position(self):
+        """(line, column), or (None, None) for a token without a source."""
+        if self.line_index is None:
+            return None, None
+        return self.line_index.position(self.offset)
 
     def __repr__(self):
         return f"Token({self.type}, '{self.value}' at {self.line} : {self.column})"
@@ -19,18 +42,11 @@ class Lexer:
     def __init__(self, text):
         self.text = text
         self.pos = 0
-        self.line = 1
-        self.column = 1
+        self.line_index = LineIndex(text)
         self.current_char = self.text[0] if text else None
 
     def advance(self):
         """Move to the next char in the text."""
-        if self.current_char == "\n":
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
-        
         self.pos += 1
         if self.pos < len(self.text):
             self.current_char = self.text[self.pos]
@@ -41,8 +57,7 @@ class Lexer:
         """"The 'Engine' which finds the next token!!"""
         while self.current_char is not None:
 
-            start_col = self.column
-            start_line = self.line
+            start = self.pos
 
             # 1. Skip Whitespace
             if self.current_char.isspace():
@@ -53,7 +68,7 @@ class Lexer:
             if self.current_char.isalpha() or self.current_char == '_':
                 word_text = self._handle_word()
                 t_type = KEYWORDS.get(word_text.upper(), TokenType.IDENTIFIER)
-                return Token(t_type, word_text, start_line, start_col)
+                return Token(t_type, word_text, start, self.line_index)
             
             # handle Numbers
             if self.current_char.isdigit():
@@ -63,26 +78,37 @@ class Lexer:
             if self.current_char == "'":
                 return self._handle_string()
 
+            # handle parameter placeholders : ?, :name, $1
+            if self.current_char == "?":
+                self.advance()
+                return Token(TokenType.PLACEHOLDER, '?', start, self.line_index)
+
+            next_char = self.peek()
+            if next_char is not None and (
+                    (self.current_char == ":" and (next_char.isalpha() or next_char == '_')) or
+                    (self.current_char == "$" and next_char.isdecimal())):
+                return self._handle_placeholder()
+
             # 3. Handle Operator
             if self.current_char == "*":
                 self.advance()
-                return Token(TokenType.ASTERISK, '*', start_line, start_col)
+                return Token(TokenType.ASTERISK, '*', start, self.line_index)
             
             if self.current_char == ",":
                 self.advance()
-                return Token(TokenType.COMMA, ',', start_line, start_col)
+                return Token(TokenType.COMMA, ',', start, self.line_index)
             
             if self.current_char == "=":
                 self.advance()
-                return Token(TokenType.EQUALS, '=', start_line, start_col)
+                return Token(TokenType.EQUALS, '=', start, self.line_index)
             
             if self.current_char == "(":
                 self.advance()
-                return Token(TokenType.LPAREN, '(', start_line, start_col)
+                return Token(TokenType.LPAREN, '(', start, self.line_index)
             
             if self.current_char == ")":
                 self.advance()
-                return Token(TokenType.RPAREN, ')', start_line, start_col)
+                return Token(TokenType.RPAREN, ')', start, self.line_index)
             
                         # --- Comparison Operators (VERY IMPORTANT) ---
 
@@ -90,48 +116,57 @@ class Lexer:
             if self.current_char == ">" and self.peek() == "=":
                 self.advance()
                 self.advance()
-                return Token(TokenType.GREATER_EQUALS, ">=", start_line, start_col)
+                return Token(TokenType.GREATER_EQUALS, ">=", start, self.line_index)
 
             # <=
             if self.current_char == "<" and self.peek() == "=":
                 self.advance()
                 self.advance()
-                return Token(TokenType.LESS_EQUALS, "<=", start_line, start_col)
+                return Token(TokenType.LESS_EQUALS, "<=", start, self.line_index)
 
             # !=
             if self.current_char == "!" and self.peek() == "=":
                 self.advance()
                 self.advance()
-                return Token(TokenType.NOT_EQUALS, "!=", start_line, start_col)
+                return Token(TokenType.NOT_EQUALS, "!=", start, self.line_index)
 
             # <>
             if self.current_char == "<" and self.peek() == ">":
                 self.advance()
                 self.advance()
-                return Token(TokenType.NOT_EQUALS, "<>", start_line, start_col)
+                return Token(TokenType.NOT_EQUALS, "<>", start, self.line_index)
 
             # >
             if self.current_char == ">":
                 self.advance()
-                return Token(TokenType.GREATER, ">", start_line, start_col)
+                return Token(TokenType.GREATER, ">", start, self.line_index)
 
             # <
             if self.current_char == "<":
                 self.advance()
-                return Token(TokenType.LESS, "<", start_line, start_col)
+                return Token(TokenType.LESS, "<", start, self.line_index)
 
             if self.current_char == ";":
                 self.advance()
-                return Token(TokenType.SEMICOLON, ';', start_line, start_col)
+                return Token(TokenType.SEMICOLON, ';', start, self.line_index)
             
-            logger.error(f"Unknown Character Found : {self.current_char}")
+            logger.error("Unknown Character Found : %s", self.current_char)
+            line, column = self.line_index.position(self.pos)
             return SQLError(
                 message=f"Unknown Character '{self.current_char}' found!",
-                line=self.line,
-                column=self.column,
+                line=line,
+                column=column,
                 detail="Unknown Character has been detected!")
         
-        return Token(TokenType.EOF, None, self.line, self.column)
+        return Token(TokenType.EOF, None, self.pos, self.line_index)
+
+    def iter_tokens(self):
+        """Lazily yield tokens up to and including EOF, or the first SQLError."""
+        while True:
+            token = self.get_next_token()
+            yield token
+            if isinstance(token, SQLError) or token.type == TokenType.EOF:
+                return
     
     def _handle_word(self):
         result = ""
@@ -141,6 +176,20 @@ class Lexer:
 
         return result
     
+    def _handle_placeholder(self):
+        start = self.pos
+        result = self.current_char
+        self.advance()
+
+        if result == "$":
+            while self.current_char is not None and self.current_char.isdecimal():
+                result += self.current_char
+                self.advance()
+        else:
+            result += self._handle_word()
+
+        return Token(TokenType.PLACEHOLDER, result, start, self.line_index)
+
     def _handle_number(self):
         result = ""
         decimal_count = 0
@@ -149,17 +198,19 @@ class Lexer:
                 decimal_count += 1
                 if decimal_count > 1:
                     logger.error("Invalid Number Format : multiple decimal points")
+                    line, column = self.line_index.position(self.pos)
                     return SQLError(
                         message="Invalid Number Format",
-                        line=self.line,
-                        column=self.column,
+                        line=line,
+                        column=column,
                         detail="Decimal Number can't have more that one decimal point '.' ."
                     )
                 
             result += self.current_char
             self.advance()
         
-        return Token(TokenType.NUMBER, float(result) if decimal_count > 0 else int(result), self.line, self.column)
+        # positioned right after the literal
+        return Token(TokenType.NUMBER, float(result) if decimal_count > 0 else int(result), self.pos, self.line_index)
     
     def _handle_string(self):
         result = ""
@@ -172,13 +223,14 @@ class Lexer:
 
         if self.current_char == "'":
             self.advance()
-            return Token(TokenType.STRING, result, self.line, self.column)
+            return Token(TokenType.STRING, result, self.pos, self.line_index)
         else:
             logger.error("Lexer Error : Unterminated string literal")
+            line, column = self.line_index.position(self.pos)
             return SQLError(
                 message="Unterminated String Literal",
-                line=self.line,
-                column= self.column,
+                line=line,
+                column=column,
                 detail="Make sure you closed your single quotes (')."
             )
     def peek(self):
@@ -187,3 +239,305 @@ class Lexer:
             if peek_pos >= len(self.text):
                 return None
             return self.text[peek_pos]
+
+
+# One alternation per token family, tried in the same order as Lexer.get_next_token.
+# WORD starts with a letter or '_' and NUMBER swallows every '.' so the multiple
+# decimal point check can still report the exact column of the bad '.'.
+MASTER_PATTERN = re.compile(r"""
+      (?P<WS>\s+)
+    | (?P<WORD>[^\W\d]\w*)
+    | (?P<NUMBER>\d[\d.]*)
+    | (?P<STRING>'[^']*')
+    | (?P<PLACEHOLDER>\?|:[^\W\d]\w*|\$\d+)
+    | (?P<OP>>=|<=|!=|<>|[*,=()<>;])
+""", re.VERBOSE)
+
+OPERATORS = {
+    "*": TokenType.ASTERISK,
+    ",": TokenType.COMMA,
+    "=": TokenType.EQUALS,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    ">=": TokenType.GREATER_EQUALS,
+    "<=": TokenType.LESS_EQUALS,
+    "!=": TokenType.NOT_EQUALS,
+    "<>": TokenType.NOT_EQUALS,
+    ">": TokenType.GREATER,
+    "<": TokenType.LESS,
+    ";": TokenType.SEMICOLON,
+}
+
+
+class RegexLexer:
+    """
+    Drop-in replacement for Lexer that matches whole tokens with MASTER_PATTERN
+    and slices their values straight out of the source text.
+    Tokens, errors and their line/column positions are identical to Lexer.
+    """
+    def __init__(self, text, pos=0, line_index=None):
+        """
+        pos: offset to start lexing from, it must not be inside a token.
+        line_index: LineIndex of text to share with the caller (one is made otherwise).
+        """
+        self.text = text
+        self.pos = pos
+        self.length = len(text) if text else 0
+        self.line_index = line_index if line_index is not None else LineIndex(text)
+        self.token_start = 0            # source span of the last token returned
+        self.token_end = 0
+        self.resume_pos = 0             # where iter_tokens(recover=True) carries on after an error
+
+    def get_next_token(self):
+        """Same contract as Lexer.get_next_token: a Token, or an SQLError."""
+        text = self.text
+        pos = self.pos
+        line_index = self.line_index
+
+        while pos < self.length:
+            match = MASTER_PATTERN.match(text, pos)
+            if match is None:
+                self.pos = pos
+                return self._error_at(pos)
+
+            kind = match.lastgroup
+            end = match.end()
+
+            if kind == "WS":
+                pos = end
+                continue
+
+            if kind == "WORD":
+                word_text = match.group()
+                first = word_text[0]
+                if not (first.isalpha() or first == "_"):
+                    # numeric chars such as '\u00bd' are word chars but can't start a word
+                    self.pos = pos
+                    return self._error_at(pos)
+                self.pos = end
+                self.token_start, self.token_end = pos, end
+                t_type = KEYWORDS.get(word_text.upper(), TokenType.IDENTIFIER)
+                return Token(t_type, word_text, pos, line_index)
+
+            if kind == "PLACEHOLDER":
+                placeholder = match.group()
+                if placeholder[0] == ":" and not (placeholder[1].isalpha() or placeholder[1] == "_"):
+                    self.pos = pos
+                    return self._error_at(pos)
+                self.pos = end
+                self.token_start, self.token_end = pos, end
+                return Token(TokenType.PLACEHOLDER, placeholder, pos, line_index)
+
+            if kind == "OP":
+                self.pos = end
+                self.token_start, self.token_end = pos, end
+                return Token(OPERATORS[match.group()], match.group(), pos, line_index)
+
+            if kind == "NUMBER":
+                number_text = match.group()
+                decimal_count = number_text.count(".")
+                if decimal_count > 1:
+                    bad_dot = number_text.index(".", number_text.index(".") + 1)
+                    self.pos = pos + bad_dot
+                    self.resume_pos = end
+                    logger.error("Invalid Number Format : multiple decimal points")
+                    line, column = line_index.position(self.pos)
+                    return SQLError(
+                        message="Invalid Number Format",
+                        line=line,
+                        column=column,
+                        detail="Decimal Number can't have more that one decimal point '.' ."
+                    )
+                self.pos = end
+                self.token_start, self.token_end = pos, end
+                value = float(number_text) if decimal_count > 0 else int(number_text)
+                # Lexer reports numbers at the position right after the literal
+                return Token(TokenType.NUMBER, value, end, line_index)
+
+            # STRING -- like Lexer, positioned right after the closing quote
+            self.pos = end
+            self.token_start, self.token_end = pos, end
+            return Token(TokenType.STRING, text[pos + 1:end - 1], end, line_index)
+
+        self.pos = pos
+        self.token_start = self.token_end = pos
+        return Token(TokenType.EOF, None, pos, line_index)
+
+    def iter_tokens(self, recover=False):
+        """
+        Lazily yield tokens up to and including EOF, or the first SQLError.
+        With recover, lexing goes on past each error (the bad input is skipped).
+        """
+        while True:
+            token = self.get_next_token()
+            yield token
+            if isinstance(token, SQLError):
+                if not recover:
+                    return
+                self._skip_error()
+            elif token.type == TokenType.EOF:
+                return
+
+    def _skip_error(self):
+        """Step over the input that made get_next_token fail (the bad char, or the whole bad number)."""
+        self.pos = self.resume_pos
+
+    def _char_at(self, pos):
+        return self.text[pos]
+
+    def _error_at(self, pos):
+        """Build the SQLError for a char that no token pattern accepts."""
+        char = self._char_at(pos)
+
+        if char == "'":
+            # Lexer consumes the rest of the text before giving up on the string
+            self.pos = self.resume_pos = self.length
+            logger.error("Lexer Error : Unterminated string literal")
+            line, column = self.line_index.position(self.length)
+            return SQLError(
+                message="Unterminated String Literal",
+                line=line,
+                column=column,
+                detail="Make sure you closed your single quotes (')."
+            )
+
+        self.resume_pos = pos + 1
+        logger.error("Unknown Character Found : %s", char)
+        line, column = self.line_index.position(pos)
+        return SQLError(
+            message=f"Unknown Character '{char}' found!",
+            line=line,
+            column=column,
+            detail="Unknown Character has been detected!")
+
+
+# ---------------- ASCII bytes input ---------------- #
+
+# MASTER_PATTERN with the ASCII sets spelled out: over bytes \s, \w and \d only
+# know ASCII, and [\t\n\x0b\x0c\r\x1c-\x1f ] is what str \s matches below 128
+ASCII_PATTERN = re.compile(rb"""
+      (?P<WS>[\t\n\x0b\x0c\r\x1c-\x1f ]+)
+    | (?P<WORD>[A-Za-z_]\w*)
+    | (?P<NUMBER>\d[\d.]*)
+    | (?P<STRING>'[^']*')
+    | (?P<PLACEHOLDER>\?|:[A-Za-z_]\w*|\$\d+)
+    | (?P<OP>>=|<=|!=|<>|[*,=()<>;])
+""", re.VERBOSE)
+
+NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+BYTE_KEYWORDS = {word.encode("ascii"): token_type for word, token_type in KEYWORDS.items()}
+BYTE_OPERATORS = {op.encode("ascii"): (token_type, op) for op, token_type in OPERATORS.items()}
+
+
+def is_ascii(text):
+    """True when a str or bytes-like input has no char / byte above 127."""
+    if isinstance(text, (str, bytes, bytearray)):
+        return text.isascii()
+    return NON_ASCII.search(text) is None
+
+
+class BytesToken(Token):
+    """
+    Token lexed from an ASCII buffer. It keeps its span instead of a value and
+    decodes the slice only when the value is read, so keywords, skipped literals
+    and the like never get decoded at all.
+    """
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, type, offset, line_index, source, start, end):
+        self.type = type
+        self.offset = offset
+        self.line_index = line_index
+        self.source = source
+        self.start = start
+        self.end = end
+
+    @property
+    def value(self):
+        return str(self.source[self.start:self.end], "ascii")
+
+
+class BytesLexer(RegexLexer):
+    """
+    RegexLexer over a bytes, bytearray or memoryview input that is pure ASCII
+    (see is_ascii): chars are classified by ASCII_PATTERN and nothing is decoded
+    up front. Offsets are byte offsets, which for ASCII are the char offsets the
+    str lexers report, so tokens, errors and positions are the same.
+    Use lexer_for() to get the right lexer for an input of unknown content.
+    """
+    def get_next_token(self):
+        """Same contract as RegexLexer.get_next_token."""
+        text = self.text
+        pos = self.pos
+        line_index = self.line_index
+
+        while pos < self.length:
+            match = ASCII_PATTERN.match(text, pos)
+            if match is None:
+                self.pos = pos
+                return self._error_at(pos)
+
+            kind = match.lastgroup
+            end = match.end()
+
+            if kind == "WS":
+                pos = end
+                continue
+
+            self.pos = end
+            self.token_start, self.token_end = pos, end
+
+            if kind == "WORD":
+                t_type = BYTE_KEYWORDS.get(match.group().upper(), TokenType.IDENTIFIER)
+                return BytesToken(t_type, pos, line_index, text, pos, end)
+
+            if kind == "OP":
+                t_type, op = BYTE_OPERATORS[match.group()]
+                return Token(t_type, op, pos, line_index)
+
+            if kind == "PLACEHOLDER":
+                return BytesToken(TokenType.PLACEHOLDER, pos, line_index, text, pos, end)
+
+            if kind == "NUMBER":
+                number_text = match.group()
+                decimal_count = number_text.count(b".")
+                if decimal_count > 1:
+                    bad_dot = number_text.index(b".", number_text.index(b".") + 1)
+                    self.pos = pos + bad_dot
+                    self.resume_pos = end
+                    logger.error("Invalid Number Format : multiple decimal points")
+                    line, column = line_index.position(self.pos)
+                    return SQLError(
+                        message="Invalid Number Format",
+                        line=line,
+                        column=column,
+                        detail="Decimal Number can't have more that one decimal point '.' ."
+                    )
+                # int() / float() read ASCII digits straight from bytes
+                value = float(number_text) if decimal_count > 0 else int(number_text)
+                return Token(TokenType.NUMBER, value, end, line_index)
+
+            # STRING, positioned right after the closing quote like in the other lexers
+            return BytesToken(TokenType.STRING, end, line_index, text, pos + 1, end - 1)
+
+        self.pos = pos
+        self.token_start = self.token_end = pos
+        return Token(TokenType.EOF, None, pos, line_index)
+
+    def _char_at(self, pos):
+        return chr(self.text[pos])
+
+
+def lexer_for(text):
+    """
+    RegexLexer for a str, BytesLexer for an ASCII bytes-like input. A buffer with
+    any non-ASCII byte is decoded as UTF-8 and takes the str (Unicode) path; a
+    byte that is not UTF-8 becomes U+FFFD, which the lexer reports as an unknown
+    character at its position (like LineIndex.line_text shows it).
+    """
+    if isinstance(text, str):
+        return RegexLexer(text)
+    if is_ascii(text):
+        return BytesLexer(text)
+    return RegexLexer(str(text, "utf-8", "replace"))
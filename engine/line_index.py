@@ -0,0 +1,63 @@
+import re
+from array import array
+from bisect import bisect_right
+
+NEWLINE = re.compile("\n")
+BYTES_NEWLINE = re.compile(b"\n")
+
+
+class LineIndex:
+    """
+    Line start offsets of one input text. The lexers only keep offsets; line and
+    column are worked out from this table when something asks for them (an error,
+    a report, the editor integration), with a bisect instead of per-char counting.
+    Lines break on '\\n' only and both numbers are 1-based, as the lexers report them.
+    The text may also be an ASCII bytes-like input (BytesLexer); offsets are then byte offsets.
+    The table is built on first use, so inputs that never need a position never pay for it.
+    """
+    __slots__ = ("text", "_starts")
+
+    def __init__(self, text):
+        self.text = text or ""
+        self._starts = None
+
+    @property
+    def starts(self):
+        """array of the offsets where each line begins (line 1 starts at 0)."""
+        if self._starts is None:
+            starts = array("q", [0])
+            newline = NEWLINE if isinstance(self.text, str) else BYTES_NEWLINE
+            starts.extend(match.end() for match in newline.finditer(self.text))
+            self._starts = starts
+        return self._starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    def position(self, offset):
+        """(line, column) of an offset; (None, None) for an unknown offset."""
+        if offset is None:
+            return None, None
+        starts = self.starts
+        line = bisect_right(starts, offset)
+        return line, offset - starts[line - 1] + 1
+
+    def offset(self, line, column):
+        """Offset of a line/column position, the inverse of position()."""
+        return self.starts[line - 1] + column - 1
+
+    def line_text(self, line):
+        """Text of a line, without its newline."""
+        starts = self.starts
+        end = starts[line] - 1 if line < len(starts) else len(self.text)
+        text = self.text[starts[line - 1]:end]
+        return text if isinstance(text, str) else str(text, "utf-8", "replace")
+
+    def excerpt(self, line, column, width=80):
+        """
+        Up to `width` chars of a line around `column`, for error displays.
+        Returns (text, caret) where caret is the 0-based index of the column in text.
+        """
+        text = self.line_text(line)
+        first = max(0, min(column - 1 - width * 3 // 4, len(text) - width))
+        return text[first:first + width], column - 1 - first
@@ -1,23 +1,142 @@
 import logging
+import re
+import sys
+from types import GeneratorType
 from engine.tokens import TokenType
 from engine.exceptions import SQLError
+from engine.token_stream import TokenStream
+from engine.token_buffer import TokenBuffer, TYPE_CODES
+from engine.tracing import TRACER
+from engine.ast_nodes import (Select, Insert, Update, Delete, Assignment, Comparison,
+                              InPredicate, ValueList, Literal, ColumnRef, Subquery, Join, OrderItem)
+from engine.grammar import (STATEMENT_DISPATCH, SELECT_CLAUSES, COMPARISON_OPERATORS,
+                            LITERAL_TYPES, VALUE_TYPES, ORDER_DIRECTIONS)
 
 logger = logging.getLogger("SQLValidator")
 
+# Deepest subquery nesting accepted before parsing stops with an SQLError
+DEFAULT_MAX_DEPTH = 10_000
+
+
+def _code(token_type):
+    """One byte type code, as stored in TokenBuffer.types."""
+    return bytes([TYPE_CODES[token_type]])
+
+
+def _code_class(token_types):
+    return b"[" + b"".join(re.escape(_code(t)) for t in token_types) + b"]"
+
+
+# Long literal lists are matched on the type codes of an indexed TokenBuffer,
+# so the regex engine walks them instead of the parser, one Token at a time.
+# From Python 3.11 the repeats are possessive (*+): nothing is ever given back,
+# so sre keeps no backtracking state and memory stays flat however many rows
+# there are. Older versions get a plain * (same matches: a ',' never stands where
+# a ')' is expected), which keeps ~64 bytes of state per element.
+_REPEAT = b"*+" if sys.version_info >= (3, 11) else b"*"
+_COMMA_CODE, _LPAREN_CODE = _code(TokenType.COMMA), _code(TokenType.LPAREN)
+_COMMA, _LPAREN, _RPAREN = re.escape(_COMMA_CODE), re.escape(_LPAREN_CODE), re.escape(_code(TokenType.RPAREN))
+_LITERAL_RUN = re.compile(b"(?:" + _code_class(LITERAL_TYPES) + _COMMA + b")" + _REPEAT)
+_VALUE_RUN = re.compile(b"(?:" + _code_class(VALUE_TYPES) + _COMMA + b")" + _REPEAT)
+_VALUE_ROWS = re.compile(
+    b"(?:" + _LPAREN + b"(?:" + _code_class(LITERAL_TYPES) + _COMMA + b")" + _REPEAT
+    + _code_class(LITERAL_TYPES) + _RPAREN + _COMMA + b")" + _REPEAT)
+
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
+    """
+    Grammar rules that can nest (SELECT, its clauses, predicates, values) are
+    generators: instead of calling a sub-rule they `yield` its generator and get
+    its result sent back. _run drives them on an explicit stack, so subquery
+    nesting is bounded by max_depth and memory, not by Python's recursion limit.
+    """
+    def __init__(self, tokens, build_ast=True, max_depth=DEFAULT_MAX_DEPTH):
+        """
+        tokens: a ready-made token list (read by index), or a TokenStream /
+        token iterator such as Lexer.iter_tokens() (read lazily while lexing).
+        build_ast: parse_* return AST nodes (engine.ast_nodes); when False they
+        only check the grammar and return "SUCCESS".
+        max_depth: deepest subquery nesting allowed (None for no limit).
+        """
         self.pos = 0
-        self.current_token = self.tokens[self.pos] if tokens else None
         self.error = None
+        self.errors = []        # every syntax error found by parse_script
+        self.build_ast = build_ast
+        self.max_depth = max_depth
+        self.depth = 0          # subqueries currently open
+        self._codes = None      # type codes of an indexed TokenBuffer, see _type_codes
+
+        if hasattr(tokens, "__getitem__"):
+            self.stream = None
+            self.tokens = tokens
+            self.current_token = self.tokens[self.pos] if tokens else None
+        else:
+            self.stream = tokens if isinstance(tokens, TokenStream) else TokenStream(tokens)
+            self.tokens = self.stream.tokens
+            self.current_token = self.stream.next()
 
     def advance(self):
-        """Move to the next token in the list."""
+        """Move to the next token in the list (or pull it from the stream)."""
         self.pos += 1
-        if self.pos < len(self.tokens):
+        if self.stream is not None:
+            self.current_token = self.stream.next()
+        elif self.pos < len(self.tokens):
             self.current_token = self.tokens[self.pos]
         return self.current_token
     
+    def _type_codes(self):
+        """Type codes of the indexed TokenBuffer as bytes, or None for a token list / stream."""
+        if self._codes is None and self.stream is None and isinstance(self.tokens, TokenBuffer):
+            self._codes = self.tokens.types.tobytes()
+        return self._codes
+
+    def _skip_value_run(self, value_types, run_pattern):
+        """
+        Fast path for long lists: consumes `value ,` pairs while the value is a plain
+        token of value_types, without building nodes or going through eat().
+        Stops on the list's last value (or on anything else) and returns how many it skipped.
+        """
+        if self.stream is not None:
+            stream = self.stream
+            token = self.current_token
+            count = 0
+            while token.type in value_types and stream.peek().type == TokenType.COMMA:
+                stream.next()
+                token = stream.next()
+                count += 1
+            self.current_token = token
+        else:
+            codes = self._type_codes()
+            if codes is not None:
+                count = (run_pattern.match(codes, self.pos).end() - self.pos) // 2
+            else:
+                tokens = self.tokens
+                pos = self.pos
+                last = len(tokens) - 1
+                while pos < last and tokens[pos].type in value_types and tokens[pos + 1].type == TokenType.COMMA:
+                    pos += 2
+                count = (pos - self.pos) // 2
+            if count:
+                self.current_token = self.tokens[self.pos + 2 * count]
+        self.pos += 2 * count
+        return count
+
+    def _skip_value_rows(self):
+        """
+        Fast path for multi-row VALUES over an indexed TokenBuffer: consumes every
+        well-formed `( literal, ... ) ,` row in one regex match. Returns (rows, values).
+        """
+        codes = self._type_codes()
+        if codes is None:
+            return 0, 0
+        start = self.pos
+        end = _VALUE_ROWS.match(codes, start).end()
+        if end == start:
+            return 0, 0
+        self.pos = end
+        self.current_token = self.tokens[end]
+        # each row holds as many values as it has commas, its trailing one included
+        return codes.count(_LPAREN_CODE, start, end), codes.count(_COMMA_CODE, start, end)
+
     def eat(self, token_type):
         """
         Compare the current token type with expected type.
@@ -25,14 +144,14 @@ class Parser:
         If not, raise error
         """
         if self.current_token.type == token_type:
-            logger.info(f"Matched {token_type}")
+            if TRACER.active:
+                TRACER.event("Matched %s", token_type)
             self.advance()
             return None
 
         else:
             # This is where SQLError obj comes in
-            error_msg = f"Expected {token_type}, but got {self.current_token.type}"
-            logger.error(error_msg)
+            logger.error("Expected %s, but got %s", token_type, self.current_token.type)
             self.error = SQLError(
                 message=f"Syntax Error : Expected {token_type.name}",
                 line=self.current_token.line,
@@ -43,95 +162,250 @@ class Parser:
 
     def parse(self):
             """The main entry point that decides which statement to parse."""
-            if self.current_token.type == TokenType.SELECT:
-                return self.parse_select()
-            elif self.current_token.type == TokenType.INSERT:
-                return self.parse_insert()
-            elif self.current_token.type == TokenType.UPDATE:
-                return self.parse_update()
-            elif self.current_token.type == TokenType.DELETE:
-                return self.parse_delete()
+            handler = STATEMENT_PARSERS.get(self.current_token.type)
+            if handler is None:
+                return SQLError(message=f"Unsupported statement start: {self.current_token.type.name}",
+                                line=self.current_token.line, column=self.current_token.column)
+            return self._run(handler(self))
+
+    @staticmethod
+    def _run(rule):
+        """
+        Run a grammar rule to its result. A generator rule yields the generator of
+        each sub-rule it needs; that one goes on the stack and its return value is
+        sent back to the caller once it finishes.
+        """
+        if type(rule) is not GeneratorType:
+            return rule
+        stack = [rule]
+        value = None
+        while stack:
+            try:
+                sub_rule = stack[-1].send(value)
+            except StopIteration as finished:
+                stack.pop()
+                value = finished.value
+                continue
+            if type(sub_rule) is GeneratorType:
+                stack.append(sub_rule)
+                value = None
             else:
-                return SQLError(message=f"Unsupported statement start: {self.current_token.type.name}")
+                # a plain (non-generator) rule already has its result
+                value = sub_rule
+        return value
+
+    def parse_script(self, recover=True, complete=True):
+        """
+        Parses every statement up to EOF with panic-mode error recovery: after a
+        syntax error the parser skips to the next ';' or clause keyword (see
+        RESYNC_PARSERS) and carries on, so one pass finds all errors.
+        Returns the parsed statements; the errors are collected in self.errors.
+
+        Without recover it returns the first syntax error (an SQLError) instead
+        of carrying on. Both ways accept exactly the same texts; a text with no
+        statement at all is rejected like parse() rejects it, unless complete is
+        off (the tokens are one piece of a script, see IncrementalLexer.parse_script).
+
+        Statements never contain a ';', so parsing the pieces of a script between
+        its ';' tokens one by one gives the same statements and errors.
+        """
+        statements = []
+        while self.current_token.type != TokenType.EOF:
+            if self.current_token.type == TokenType.SEMICOLON:
+                self.advance()
+                continue
+
+            result = self.parse()
+            if isinstance(result, SQLError):
+                if not recover:
+                    return result
+                self._recover(result)
+                continue
+            statements.append(result)
+
+            token = self.current_token
+            if token.type not in STATEMENT_PARSERS and token.type not in (TokenType.SEMICOLON, TokenType.EOF):
+                error = SQLError(
+                    f"Unexpected {token.type.name} after end of statement",
+                    token.line,
+                    token.column,
+                    detail="Separate statements with ';'.")
+                if not recover:
+                    return error
+                self._recover(error)
+
+        lexed_badly = self.stream is not None and self.stream.lex_errors
+        if complete and not statements and not self.errors and not lexed_badly:
+            # nothing but blanks and ';': "Unsupported statement start: EOF"
+            error = self.parse()
+            if not recover:
+                return error
+            self.errors.append(error)
+        return statements
+
+    def _recover(self, error):
+        """Record `error`, then skip ahead to a point where parsing can resume."""
+        self.errors.append(error)
+        resumed_at = None
+        while True:
+            token_type = self.current_token.type
+            if token_type == TokenType.EOF or token_type in STATEMENT_PARSERS:
+                return
+            if token_type == TokenType.SEMICOLON:
+                self.advance()
+                return
+
+            resume = RESYNC_PARSERS.get(token_type)
+            if resume is None or self.pos == resumed_at:
+                self.advance()
+                continue
+
+            # Carry on from the clause keyword; the rest of the statement is only checked
+            resumed_at = self.pos
+            result = self._run(resume(self))
+            if isinstance(result, SQLError):
+                self.errors.append(result)
+                continue
+            # Whatever follows the fragment is skipped quietly up to the next ';'
+            if self.current_token.type in (TokenType.SEMICOLON, TokenType.EOF):
+                continue
+            resumed_at = self.pos
 
     def parse_select(self):
         
         if self.eat(TokenType.SELECT): return self.error
         
         # Handle columns
+        columns = []
         if self.current_token.type == TokenType.ASTERISK:
+            columns.append("*")
             self.eat(TokenType.ASTERISK)
         elif self.current_token.type == TokenType.IDENTIFIER:
+            columns.append(self.current_token.value)
             self.eat(TokenType.IDENTIFIER)
             while self.current_token.type == TokenType.COMMA:
                 self.eat(TokenType.COMMA)
                 if self.current_token.type != TokenType.IDENTIFIER:
                     return SQLError("Expected column name after ','", self.current_token.line, self.current_token.column, detail="Expected a column name after ','")
+                columns.append(self.current_token.value)
                 self.eat(TokenType.IDENTIFIER)
         else:
             return SQLError(message="Expected column name or '*' after SELECT", line=self.current_token.line, column=self.current_token.column, detail="Expected a column name after ','")
 
         if self.eat(TokenType.FROM): return self.error
         
+        table = self.current_token.value
         if self.eat(TokenType.IDENTIFIER): return self.error
 
-        if self.current_token.type == TokenType.WHERE:
-            err = self._handle_where_clause()
-            if err: return err
-        
-        # Optional Semicolon
-        if self.current_token.type == TokenType.SEMICOLON:
-            self.eat(TokenType.SEMICOLON)
+        clauses = yield self._parse_select_tail()
+        if isinstance(clauses, SQLError): return clauses
             
-        return "SUCCESS"
+        if not self.build_ast: return "SUCCESS"
+        return Select(
+            columns, table,
+            where=clauses.get("where_clause"),
+            joins=clauses.get("join_clause", []),
+            group_by=clauses.get("group_by_clause", []),
+            having=clauses.get("having_clause"),
+            order_by=clauses.get("order_by_clause", []),
+            limit=clauses.get("limit_clause"))
     
     def parse_insert(self):
-        # Rule: INSERT INTO <table> (col1, col2) VALUES (val1, val2);
+        # Rule: INSERT INTO <table> (col1, col2) VALUES (val1, val2), (val3, val4);
         
         if self.eat(TokenType.INSERT): return self.error
         if self.eat(TokenType.INTO): return self.error
+        table = self.current_token.value
         if self.eat(TokenType.IDENTIFIER): return self.error # Table name
         
         # Column List: (id, name)
+        columns = []
         if self.eat(TokenType.LPAREN): return self.error
+        columns.append(self.current_token.value)
         if self.eat(TokenType.IDENTIFIER): return self.error
         while self.current_token.type == TokenType.COMMA:
             self.eat(TokenType.COMMA)
+            columns.append(self.current_token.value)
             if self.eat(TokenType.IDENTIFIER): return self.error
         if self.eat(TokenType.RPAREN): return self.error
         
+        counts = self._handle_values_clause()
+        if isinstance(counts, SQLError): return counts
+        if not self.build_ast: return "SUCCESS"
+        return Insert(table, columns, *counts)
+
+    def _parse_select_tail(self):
+        """Optional clauses (JOIN ... LIMIT), looked up by their first token. Returns {rule: node}."""
+        clauses = {}
+        last_rank = -1
+        entry = SELECT_CLAUSES.get(self.current_token.type)
+        while entry is not None:
+            rank, rule, repeatable = entry
+            if rank < last_rank or (rank == last_rank and not repeatable):
+                return SQLError(
+                    f"Unexpected {self.current_token.type.name} clause",
+                    self.current_token.line,
+                    self.current_token.column,
+                    detail="Clauses go in the order JOIN, WHERE, GROUP BY, HAVING, ORDER BY, LIMIT.")
+            last_rank = rank
+
+            node = CLAUSE_PARSERS[rule](self)
+            if type(node) is GeneratorType:
+                node = yield node
+            if isinstance(node, SQLError): return node
+            if repeatable:
+                clauses.setdefault(rule, []).append(node)
+            else:
+                clauses[rule] = node
+            entry = SELECT_CLAUSES.get(self.current_token.type)
+        return clauses
+
+    def _handle_values_clause(self):
+        """VALUES ( literal, ... ), ( ... ) -- returns (rows, values); no per-value nodes are built."""
         if self.eat(TokenType.VALUES): return self.error
-        
-        # Values List: ('1', 'John')
-        if self.eat(TokenType.LPAREN): return self.error
-        # Here we allow STRING or NUMBER
-        if self.current_token.type in [TokenType.STRING, TokenType.NUMBER]:
+
+        rows = values = 0
+        while True:
+            # Well-formed rows go by in bulk; the last one (or a broken one) is checked below
+            skipped_rows, skipped_values = self._skip_value_rows()
+            rows += skipped_rows
+            values += skipped_values
+
+            width = self._handle_values_row()
+            if isinstance(width, SQLError): return width
+            rows += 1
+            values += width
+            if self.current_token.type != TokenType.COMMA:
+                return rows, values
             self.advance()
-        else:
+
+    def _handle_values_row(self):
+        """One ( literal, ... ) tuple -- returns how many literals it holds."""
+        if self.eat(TokenType.LPAREN): return self.error
+        # Here we allow STRING, NUMBER or a parameter placeholder
+        width = self._skip_value_run(LITERAL_TYPES, _LITERAL_RUN)
+        if self.current_token.type not in LITERAL_TYPES:
             return SQLError("Expected value in VALUES clause", self.current_token.line, self.current_token.column)
-            
-        while self.current_token.type == TokenType.COMMA:
-            self.eat(TokenType.COMMA)
-            if self.current_token.type in [TokenType.STRING, TokenType.NUMBER]:
-                self.advance()
-            else: return self.error
-            
+        self.advance()
         if self.eat(TokenType.RPAREN): return self.error
-        return "SUCCESS"
+        return width + 1
     
     def parse_delete(self):
         if self.eat(TokenType.DELETE): return self.error
         if self.eat(TokenType.FROM): return self.error
+        table = self.current_token.value
         if self.eat(TokenType.IDENTIFIER): return self.error
         
         # Optional WHERE clause
+        where = None
         if self.current_token.type == TokenType.WHERE:
-            err = self._handle_where_clause()
-            if err: return err
+            where = self._handle_where_clause()
+            if type(where) is GeneratorType:
+                where = yield where
+            if isinstance(where, SQLError): return where
             
-        if self.current_token.type == TokenType.SEMICOLON:
-            self.eat(TokenType.SEMICOLON)
-        return "SUCCESS"    
+        if not self.build_ast: return "SUCCESS"
+        return Delete(table, where)
 
 
 
@@ -143,82 +417,242 @@ class Parser:
 
     def parse_update(self):
         if self.eat(TokenType.UPDATE): return self.error
+        table = self.current_token.value
         if self.eat(TokenType.IDENTIFIER): return self.error
+        assignments = self._handle_set_clause()
+        if isinstance(assignments, SQLError): return assignments
+
+        # Optional WHERE clause
+        where = None
+        if self.current_token.type == TokenType.WHERE:
+            where = self._handle_where_clause()
+            if type(where) is GeneratorType:
+                where = yield where
+            if isinstance(where, SQLError): return where
+
+        if not self.build_ast: return "SUCCESS"
+        return Update(table, assignments, where)
+
+    def _handle_set_clause(self):
+        """SET col = literal"""
         if self.eat(TokenType.SET): return self.error
         
         # Handle col = val
+        column = self.current_token.value
         if self.eat(TokenType.IDENTIFIER): return self.error
         if self.eat(TokenType.EQUALS): return self.error
-        if self.current_token.type in [TokenType.STRING, TokenType.NUMBER]:
+        if self.current_token.type in LITERAL_TYPES:
+            value = self.current_token
             self.advance()
         else:
             return SQLError("Expected value after '='", self.current_token.line, self.current_token.column)
+        if not self.build_ast: return None
+        return [Assignment(column, Literal(value.type, value.value))]
 
-        # Optional WHERE clause
-        if self.current_token.type == TokenType.WHERE:
-            err = self._handle_where_clause()
-            if err: return err
-
-        if self.current_token.type == TokenType.SEMICOLON:
-            self.eat(TokenType.SEMICOLON)
-        return "SUCCESS"
+    def _resume_from_clause(self):
+        """FROM <table> followed by the optional SELECT clauses (error recovery only)."""
+        if self.eat(TokenType.FROM): return self.error
+        if self.eat(TokenType.IDENTIFIER): return self.error
+        return (yield self._parse_select_tail())
 
 # Inside core/parser.py
 
     def _handle_value_or_subquery(self):
-        """Handles a literal value OR a nested (SELECT ...) query."""
+        """
+        Handles a literal value OR a nested (SELECT ...) query.
+        Returns its node (None when not building the AST) or an SQLError; for a
+        subquery it returns the generator rule that parses it.
+        """
         if self.current_token.type == TokenType.LPAREN:
-            self.eat(TokenType.LPAREN)
-            
-            # RECURSION: Start parsing as a SELECT statement again!
-            # This allows SELECT * FROM (SELECT * FROM ...)
-            result = self.parse_select() 
-            if isinstance(result, SQLError): return result
-            
-            if self.eat(TokenType.RPAREN): return self.error
-            return None
+            return self._handle_subquery()
         
         # Otherwise, it's just a normal value
-        if self.current_token.type in [TokenType.STRING, TokenType.NUMBER, TokenType.IDENTIFIER]:
+        token = self.current_token
+        if token.type in VALUE_TYPES:
             self.advance()
-            return None
+            if not self.build_ast: return None
+            if token.type == TokenType.IDENTIFIER: return ColumnRef(token.value)
+            return Literal(token.type, token.value)
             
         return SQLError("Expected value or subquery", self.current_token.line, self.current_token.column)
 
+    def _handle_subquery(self):
+        """( SELECT ... )"""
+        self.eat(TokenType.LPAREN)
+        
+        if self.max_depth is not None and self.depth >= self.max_depth:
+            return SQLError(
+                "Subqueries nested too deeply",
+                self.current_token.line,
+                self.current_token.column,
+                detail=f"At most {self.max_depth} levels of nested subqueries are allowed.")
+
+        # Start parsing as a SELECT statement again (on the rule stack, not the call stack)
+        # This allows SELECT * FROM (SELECT * FROM ...)
+        self.depth += 1
+        result = yield self.parse_select()
+        self.depth -= 1
+        if isinstance(result, SQLError): return result
+        
+        if self.eat(TokenType.RPAREN): return self.error
+        return Subquery(result) if self.build_ast else None
+
     def _handle_where_clause(self):
-         
+        """WHERE predicate -- the predicate's result, or its generator rule if it holds a subquery."""
         self.eat(TokenType.WHERE)
+        return self._handle_predicate()
+
+    def _handle_having_clause(self):
+        self.eat(TokenType.HAVING)
+        return self._handle_predicate()
+
+    def _handle_predicate(self):
+        """
+        column <op> value  |  column IN (value / subquery)  |  column IN (value, ...)
+        Plain values are parsed right here; only once a subquery turns up is the
+        rest handed back as a generator rule, so a flat WHERE costs no stack entry.
+        """
         
         # column name
+        column = self.current_token.value
         if self.eat(TokenType.IDENTIFIER): 
             return self.error
 
-        # All comparison operators
-        COMPARISON_OPERATORS = [
-            TokenType.EQUALS,
-            TokenType.NOT_EQUALS,
-            TokenType.LESS,
-            TokenType.LESS_EQUALS,
-            TokenType.GREATER,
-            TokenType.GREATER_EQUALS
-        ]
-
         # Case 1: WHERE col = / > / < / >= / <= / != value
         if self.current_token.type in COMPARISON_OPERATORS:
+            operator = self.current_token.value
             self.advance()
-            return self._handle_value_or_subquery()
+            value = self._handle_value_or_subquery()
+            if type(value) is GeneratorType:
+                return self._finish_comparison(column, operator, value)
+            if isinstance(value, SQLError) or not self.build_ast: return value
+            return Comparison(column, operator, value)
 
         # Case 2: WHERE col IN (subquery / values)
         if self.current_token.type == TokenType.IN:
             self.advance()
             if self.eat(TokenType.LPAREN): return self.error
-            err = self._handle_value_or_subquery()
-            if err: return err
-            if self.eat(TokenType.RPAREN): return self.error
-            return None
+            return self._handle_in_list(column, 0)
 
         return SQLError(
             "Expected comparison operator (=, !=, <, >, <=, >=) or IN in WHERE clause",
             self.current_token.line,
             self.current_token.column
         )
+
+    def _finish_comparison(self, column, operator, subquery):
+        """column <op> ( SELECT ... ) -- runs the subquery rule, then builds the Comparison."""
+        value = yield subquery
+        if isinstance(value, SQLError) or not self.build_ast: return value
+        return Comparison(column, operator, value)
+
+    def _handle_in_list(self, column, count):
+        """
+        value, ... ) of an IN list, `count` values already read. Returns the
+        InPredicate, or a generator rule for the rest once a subquery turns up.
+        """
+        while True:
+            # Runs of plain values are only counted
+            count += self._skip_value_run(VALUE_TYPES, _VALUE_RUN)
+            value = self._handle_value_or_subquery()
+            if type(value) is GeneratorType:
+                return self._finish_in_list(column, count, value)
+            if isinstance(value, SQLError): return value
+            count += 1
+            if self.current_token.type != TokenType.COMMA:
+                return self._close_in_list(column, count, value)
+            self.advance()
+
+    def _finish_in_list(self, column, count, subquery):
+        """Runs a subquery found in an IN list, then carries on with the rest of the list."""
+        value = yield subquery
+        if isinstance(value, SQLError): return value
+        count += 1
+        if self.current_token.type != TokenType.COMMA:
+            return self._close_in_list(column, count, value)
+        self.advance()
+        rest = self._handle_in_list(column, count)
+        if type(rest) is GeneratorType:
+            rest = yield rest
+        return rest
+
+    def _close_in_list(self, column, count, value):
+        if self.eat(TokenType.RPAREN): return self.error
+        if not self.build_ast: return None
+        return InPredicate(column, value if count == 1 else ValueList(count))
+
+    def _handle_join_clause(self):
+        # JOIN <table> ON <col> <op> <col>
+        if self.eat(TokenType.JOIN): return self.error
+        table = self.current_token.value
+        if self.eat(TokenType.IDENTIFIER): return self.error
+        if self.eat(TokenType.ON): return self.error
+        left = self.current_token.value
+        if self.eat(TokenType.IDENTIFIER): return self.error
+
+        if self.current_token.type not in COMPARISON_OPERATORS:
+            return SQLError("Expected comparison operator in JOIN condition", self.current_token.line, self.current_token.column)
+        operator = self.current_token.value
+        self.advance()
+
+        right = self.current_token.value
+        if self.eat(TokenType.IDENTIFIER): return self.error
+        if not self.build_ast: return None
+        return Join(table, left, operator, right)
+
+    def _handle_group_by_clause(self):
+        if self.eat(TokenType.GROUP): return self.error
+        if self.eat(TokenType.BY): return self.error
+        return self._handle_column_list()
+
+    def _handle_column_list(self):
+        """col, col, ... (GROUP BY)"""
+        columns = [self.current_token.value]
+        if self.eat(TokenType.IDENTIFIER): return self.error
+        while self.current_token.type == TokenType.COMMA:
+            self.eat(TokenType.COMMA)
+            columns.append(self.current_token.value)
+            if self.eat(TokenType.IDENTIFIER): return self.error
+        return columns if self.build_ast else None
+
+    def _handle_order_by_clause(self):
+        if self.eat(TokenType.ORDER): return self.error
+        if self.eat(TokenType.BY): return self.error
+
+        items = []
+        while True:
+            column = self.current_token.value
+            if self.eat(TokenType.IDENTIFIER): return self.error
+            direction = None
+            if self.current_token.type in ORDER_DIRECTIONS:
+                direction = self.current_token.type.name
+                self.advance()
+            if self.build_ast: items.append(OrderItem(column, direction))
+
+            if self.current_token.type != TokenType.COMMA:
+                return items if self.build_ast else None
+            self.eat(TokenType.COMMA)
+
+    def _handle_limit_clause(self):
+        if self.eat(TokenType.LIMIT): return self.error
+        count = self.current_token.value
+        if self.eat(TokenType.NUMBER): return self.error
+        return count if self.build_ast else None
+
+
+# Grammar rule -> Parser method, wired to the dispatch tables in engine.grammar
+STATEMENT_PARSERS = {
+    token_type: getattr(Parser, "parse_" + rule[:-len("_stmt")])
+    for token_type, rule in STATEMENT_DISPATCH.items()
+}
+CLAUSE_PARSERS = {
+    rule: getattr(Parser, "_handle_" + rule)
+    for _, rule, _ in SELECT_CLAUSES.values()
+}
+# Clause keywords parse_script re-synchronizes on after a syntax error
+RESYNC_PARSERS = {
+    TokenType.FROM: Parser._resume_from_clause,
+    TokenType.WHERE: Parser._parse_select_tail,
+    TokenType.SET: Parser._handle_set_clause,
+    TokenType.VALUES: Parser._handle_values_clause,
+}
@@ -0,0 +1,417 @@
+import re
+from engine.tokens import TokenType, KEYWORDS
+from engine.lexer import Token, RegexLexer, OPERATORS, is_ascii, lexer_for
+from engine.exceptions import SQLError
+from engine.line_index import LineIndex
+from engine.token_buffer import TYPE_CODES, TYPES_BY_CODE
+
+# NumPy is optional and only imported by the first input long enough to be
+# prescanned (see _numpy_ready), so short-lived processes never pay its ~90 ms
+# import; without it every input goes through RegexLexer
+np = None
+_numpy_missing = False
+
+# The prescan has a fixed cost of ~0.15 ms of array setup; it breaks even with
+# the RegexLexer around 600 chars and the margin covers statements that fail early
+PRESCAN_MIN_CHARS = 4 * 1024
+
+# PrescanLexer prescans this many chars at a time (up to the next whitespace
+# outside a string): the arrays take ~75 bytes per char, so the peak memory stays
+# a few hundred KB however long the text is, and the setup cost is still paid
+# for a few hundred tokens at once
+PRESCAN_WINDOW_CHARS = 4 * 1024
+# PrescanLexer.fill lexes the whole text before parsing starts, so it takes
+# bigger windows: the fixed cost is spread over more tokens (~40% faster on a
+# 2 MB INSERT) for ~5 MB of peak arrays
+FILL_WINDOW_CHARS = 64 * 1024
+_TO_WHITESPACE = re.compile(r"(?:[^'\s]+|'[^']*')*")
+
+# The prescan costs per byte, RegexLexer per token (a whole string literal is a
+# single match): past ~50 bytes per token the RegexLexer wins, e.g. on a
+# statement that is mostly one long string. Tokens are estimated from the
+# quote pairs and the bytes outside them (3-5 bytes per token in SQL).
+PRESCAN_MAX_BYTES_PER_TOKEN = 32
+UNQUOTED_BYTES_PER_TOKEN = 4
+QUOTE_BYTE = ord("'")
+
+# Texts and windows with at most this many strings have them measured with
+# str.find before any array is made (see _sparse_strings)
+FEW_STRINGS = 4
+
+# Byte classes of the prescan lookup table
+OTHER, SPACE, ALPHA, DIGIT, DOT, QUOTE, OP, BANG, QMARK, COLON, DOLLAR = range(11)
+
+TWO_CHAR_OPERATORS = {op: token_type for op, token_type in OPERATORS.items() if len(op) == 2}
+
+
+def _byte_class(byte):
+    """Class of one ASCII char, decided by the same patterns the RegexLexer uses."""
+    char = chr(byte)
+    if re.fullmatch(r"\s", char):
+        return SPACE
+    if re.fullmatch(r"[^\W\d]", char):
+        return ALPHA
+    if re.fullmatch(r"\d", char):
+        return DIGIT
+    return {".": DOT, "'": QUOTE, "!": BANG, "?": QMARK, ":": COLON, "$": DOLLAR}.get(
+        char, OP if char in OPERATORS else OTHER)
+
+
+def _build_tables(np):
+    classes = np.array([_byte_class(byte) for byte in range(128)], dtype=np.uint8)
+    upper = np.array([ord(chr(byte).upper()) for byte in range(128)], dtype=np.uint8)
+
+    # one-char operators by byte, two-char ones by (first, second) byte
+    single = np.zeros(128, dtype=np.uint8)
+    for op, token_type in OPERATORS.items():
+        if len(op) == 1:
+            single[ord(op)] = TYPE_CODES[token_type]
+    pairs = np.zeros((128, 128), dtype=np.uint8)
+    for op, token_type in TWO_CHAR_OPERATORS.items():
+        pairs[ord(op[0]), ord(op[1])] = TYPE_CODES[token_type]
+
+    # keywords as fixed-width byte strings, sorted for searchsorted
+    width = max(len(word) for word in KEYWORDS)
+    words = sorted(KEYWORDS)
+    keywords = np.array([word.encode("ascii") for word in words], dtype=f"S{width}")
+    codes = np.array([TYPE_CODES[KEYWORDS[word]] for word in words], dtype=np.uint8)
+    return classes, upper, single, pairs, keywords, codes, width
+
+
+def _numpy_ready():
+    """Import NumPy and build the lookup tables on first use; False when NumPy is not installed."""
+    global np, _numpy_missing
+    global CLASSES, UPPER, SINGLE_OPS, PAIR_OPS, KEYWORD_KEYS, KEYWORD_CODES, KEYWORD_WIDTH
+    if np is None and not _numpy_missing:
+        try:
+            import numpy
+        except ImportError:
+            _numpy_missing = True
+            return False
+        CLASSES, UPPER, SINGLE_OPS, PAIR_OPS, KEYWORD_KEYS, KEYWORD_CODES, KEYWORD_WIDTH = _build_tables(numpy)
+        np = numpy                      # last: other threads only see it with the tables built
+    return np is not None
+
+
+def _too_sparse(size, quoted, strings):
+    """Whether `size` chars, `quoted` of them in `strings` string literals, hold too few tokens to prescan."""
+    tokens = strings + (size - quoted) // UNQUOTED_BYTES_PER_TOKEN + 1      # + EOF
+    return tokens * PRESCAN_MAX_BYTES_PER_TOKEN < size
+
+
+def _sparse_strings(text, start, stop):
+    """
+    Whether text[start:stop] is better left to the RegexLexer without trying
+    prescan(): it has FEW_STRINGS at most and they make it too sparse (one long
+    string, say), or it ends in an unterminated string. Spans with more strings
+    are left to prescan()'s own check.
+    """
+    quoted = strings = 0
+    opening = text.find("'", start, stop)
+    while opening >= 0:
+        if strings == FEW_STRINGS:
+            return False
+        close = text.find("'", opening + 1, stop)
+        if close < 0:
+            return True
+        quoted += close - opening + 1
+        strings += 1
+        opening = text.find("'", close + 1, stop)
+    return strings > 0 and _too_sparse(stop - start, quoted, strings)
+
+
+class Prescan:
+    """Token type codes and source spans of a whole input, as NumPy arrays (EOF included)."""
+    __slots__ = ("types", "starts", "ends")
+
+    def __init__(self, types, starts, ends):
+        self.types = types
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.types)
+
+
+def prescan(data):
+    """
+    Vectorized tokenizer pass over the raw bytes of a buffer (bytes, memoryview,
+    mmap) or an ASCII str. Every byte is classified through a lookup table, quote
+    spans are paired up and token boundaries found with whole-array ops.
+
+    Returns a Prescan with exactly the tokens RegexLexer would produce, or None
+    when the input is not one the prescan can vouch for: NumPy missing, a
+    non-ASCII byte, or anything the lexer would report an error for (unknown
+    char, unterminated string, bad number or placeholder). None as well when
+    the input has too few tokens for its size to be worth it (see
+    PRESCAN_MAX_BYTES_PER_TOKEN). Callers then lex it the ordinary way.
+    """
+    if not _numpy_ready():
+        return None
+    if isinstance(data, str):
+        if not data.isascii():
+            return None
+        data = data.encode("ascii")
+    raw = np.frombuffer(data, dtype=np.uint8)
+    n = raw.size
+    if n and raw.max() >= 128:
+        return None
+
+    # ---- strings: no escapes, so quotes simply pair up in order ----
+    quotes = np.flatnonzero(raw == QUOTE_BYTE)
+    if quotes.size % 2:
+        return None                                     # unterminated string
+    opens, closes = quotes[0::2], quotes[1::2]
+    if _too_sparse(n, int(closes.sum() - opens.sum()) + opens.size, opens.size):
+        return None                                     # mostly string bodies
+    cls = CLASSES[raw]
+    if opens.size:
+        depth = np.zeros(n + 1, dtype=np.int8)
+        depth[opens] = 1
+        depth[closes + 1] -= 1                          # 'a''b': a close and the next open share a slot
+        inside = np.cumsum(depth[:n], dtype=np.int8).astype(bool)
+        cls[inside] = SPACE                             # strings separate tokens like spaces do
+
+    if (cls == OTHER).any():
+        return None                                     # unknown char
+
+    nxt = np.empty(n, dtype=np.uint8)                   # class of the following byte
+    nxt[:-1] = cls[1:]
+    if n:
+        nxt[-1] = SPACE
+    prev_alnum = np.zeros(n, dtype=bool)
+
+    # ---- operators: >= <= != <> pair up greedily, '!' only exists as '!=' ----
+    pair_codes = np.zeros(n, dtype=np.uint8)
+    if n > 1:
+        pair_codes[:-1] = PAIR_OPS[raw[:-1], raw[1:]]
+        pair_codes[cls == SPACE] = 0                    # not inside strings
+    is_pair = pair_codes != 0
+    # "<>=" is the only overlap: '>' can close '<>' and open '>=', the lexer takes '<>'
+    pair_start = is_pair.copy()
+    pair_start[1:] &= ~is_pair[:-1]
+    pair_second = np.zeros(n, dtype=bool)
+    pair_second[1:] = pair_start[:-1]
+    if ((cls == BANG) & ~pair_start).any():
+        return None
+
+    # ---- placeholders: ':' + word, '$' + digits ----
+    colon = cls == COLON
+    dollar = cls == DOLLAR
+    if (colon & (nxt != ALPHA)).any() or (dollar & (nxt != DIGIT)).any():
+        return None
+
+    # ---- words and numbers: runs of [A-Za-z0-9_.] ----
+    alnum = (cls == ALPHA) | (cls == DIGIT) | (cls == DOT)
+    prev_alnum[1:] = alnum[:-1]
+    run_start = alnum & ~prev_alnum
+    run_index = np.flatnonzero(run_start)
+    positions = np.flatnonzero(alnum)
+    run_of = np.cumsum(run_start[positions]) - 1         # run number of each alnum byte
+    first_cls = cls[run_index]
+    after_dollar = np.zeros(run_index.size, dtype=bool)
+    has_prev = run_index > 0
+    after_dollar[has_prev] = dollar[run_index[has_prev] - 1]
+
+    alpha_here = cls[positions] == ALPHA
+    alpha_seen = np.cumsum(alpha_here)
+    run_alpha_base = (alpha_seen - alpha_here)[run_start[positions]]
+    alpha_upto = alpha_seen - run_alpha_base[run_of]     # alphas in the run up to here, inclusive
+
+    # a run that starts with a digit is a number up to its first letter, then a word
+    digit_run = first_cls[run_of] == DIGIT
+    split = alpha_here & digit_run & (alpha_upto == 1)
+
+    dots = cls[positions] == DOT
+    if dots.any():
+        # a '.' is only fine inside the number part of a digit run, once per run,
+        # and never in the digits of a $1 placeholder
+        good_dot = dots & digit_run & (alpha_upto == 0) & ~after_dollar[run_of]
+        if (dots & ~good_dot).any():
+            return None
+        if np.bincount(run_of[dots], minlength=run_index.size).max() > 1:
+            return None
+
+    # ---- token starts and ends ----
+    starts = run_start.copy()
+    starts[positions[split]] = True
+    placeholder_body = np.zeros(n, dtype=bool)
+    placeholder_body[1:] = colon[:-1] | dollar[:-1]
+    starts &= ~placeholder_body                         # the word / digits belong to the ':' / '$'
+    starts |= colon | dollar | (cls == QMARK)
+    starts |= ((cls == OP) | (cls == BANG)) & ~pair_second
+
+    token_starts = np.flatnonzero(starts)
+    boundaries = np.flatnonzero(starts | (cls == SPACE))
+    boundaries = np.append(boundaries, n)
+    token_ends = boundaries[np.searchsorted(boundaries, token_starts, side="right")]
+
+    first = cls[token_starts]
+    types = np.full(token_starts.size, TYPE_CODES[TokenType.PLACEHOLDER], dtype=np.uint8)
+    types[first == DIGIT] = TYPE_CODES[TokenType.NUMBER]
+    ops = (first == OP) | (first == BANG)
+    types[ops] = SINGLE_OPS[raw[token_starts[ops]]]
+    paired = pair_start[token_starts]
+    types[paired] = pair_codes[token_starts[paired]]
+    words = first == ALPHA
+    types[words] = _word_codes(raw, token_starts[words], token_ends[words])
+
+    # ---- merge in the strings and close with EOF ----
+    string_code = TYPE_CODES[TokenType.STRING]
+    all_starts = np.concatenate([token_starts, opens, [n]])
+    all_ends = np.concatenate([token_ends, closes + 1, [n]])
+    all_types = np.concatenate([types, np.full(opens.size, string_code, dtype=np.uint8),
+                                [TYPE_CODES[TokenType.EOF]]]).astype(np.uint8)
+    order = np.argsort(all_starts, kind="stable")
+    return Prescan(all_types[order], all_starts[order], all_ends[order])
+
+
+def _word_codes(raw, starts, ends):
+    """KEYWORDS lookup for a batch of words, uppercased and compared as fixed-width byte strings."""
+    codes = np.full(starts.size, TYPE_CODES[TokenType.IDENTIFIER], dtype=np.uint8)
+    lengths = ends - starts
+    short = np.flatnonzero(lengths <= KEYWORD_WIDTH)
+    if not short.size:
+        return codes
+
+    offsets = np.arange(KEYWORD_WIDTH)
+    index = np.minimum(starts[short, None] + offsets, raw.size - 1)
+    chars = np.where(offsets < lengths[short, None], UPPER[raw[index]], 0).astype(np.uint8)
+    keys = np.ascontiguousarray(chars).view(f"S{KEYWORD_WIDTH}").ravel()
+
+    found = np.minimum(np.searchsorted(KEYWORD_KEYS, keys), KEYWORD_KEYS.size - 1)
+    hit = KEYWORD_KEYS[found] == keys
+    codes[short[hit]] = KEYWORD_CODES[found[hit]]
+    return codes
+
+
+class PrescanLexer:
+    """
+    RegexLexer stand-in for long ASCII texts. iter_tokens() runs prescan() over
+    one window of about PRESCAN_WINDOW_CHARS at a time, so only that window's
+    arrays are held and lexing still streams into the parser. A window prescan()
+    turns down (a lexer error in it, mostly string bodies, ...) is lexed by a
+    RegexLexer, which reports the errors. It has the attributes TokenStream and
+    TokenBuffer.from_lexer rely on (text, pos, line_index, token_start /
+    token_end, iter_tokens).
+    """
+    def __init__(self, text, line_index=None):
+        self.text = text
+        self.pos = 0
+        self.length = len(text)
+        self.line_index = line_index if line_index is not None else LineIndex(text)
+        self.token_start = 0
+        self.token_end = 0
+
+    def _window_end(self, start, size):
+        """End of the window at `start`: a whitespace char outside strings (no token straddles it) or the end."""
+        text, length = self.text, self.length
+        stop = start + size
+        if stop >= length:
+            return length
+        if text.count("'", start, stop) % 2:
+            # inside a string: the window takes all of it
+            stop = text.find("'", stop) + 1
+            if not stop:
+                return length
+        end = _TO_WHITESPACE.match(text, stop).end()
+        # an unterminated string is only ever in the last window
+        return end if end < length and text[end] != "'" else length
+
+    def _windows(self, size):
+        """(start, stop, Prescan or None) of each window; None when prescan() turned it down."""
+        text, length = self.text, self.length
+        start = 0
+        while start < length:
+            stop = self._window_end(start, size)
+            yield start, stop, None if _sparse_strings(text, start, stop) else prescan(text[start:stop])
+            start = stop
+
+    def _window_lexer(self, start, stop):
+        lexer = RegexLexer(self.text, start, self.line_index)
+        lexer.length = stop                     # it gives EOF at the window's end
+        return lexer
+
+    def iter_tokens(self, recover=False):
+        """Lazily yield tokens up to and including EOF, or the first SQLError (every one with recover)."""
+        text, length, line_index = self.text, self.length, self.line_index
+        number, string, eof = TokenType.NUMBER, TokenType.STRING, TokenType.EOF
+        for start, stop, scan in self._windows(PRESCAN_WINDOW_CHARS):
+            if scan is None:
+                lexer = self._window_lexer(start, stop)
+                for token in lexer.iter_tokens(recover):
+                    self.pos = lexer.pos
+                    if isinstance(token, SQLError):
+                        yield token
+                        if not recover:
+                            return
+                        continue
+                    if token.type is eof:
+                        break
+                    self.token_start, self.token_end = lexer.token_start, lexer.token_end
+                    yield token
+                continue
+
+            # the window's EOF is dropped, spans are moved to the whole text
+            starts = (scan.starts[:-1] + start).tolist()
+            ends = (scan.ends[:-1] + start).tolist()
+            for code, token_start, token_end in zip(scan.types[:-1].tolist(), starts, ends):
+                token_type = TYPES_BY_CODE[code]
+                self.pos = token_end
+                self.token_start, self.token_end = token_start, token_end
+                # values and positions as RegexLexer makes them (literals sit after their end)
+                if token_type is number:
+                    number_text = text[token_start:token_end]
+                    value = float(number_text) if "." in number_text else int(number_text)
+                    yield Token(number, value, token_end, line_index)
+                elif token_type is string:
+                    yield Token(string, text[token_start + 1:token_end - 1], token_end, line_index)
+                else:
+                    yield Token(token_type, text[token_start:token_end], token_start, line_index)
+
+        self.pos = self.token_start = self.token_end = length
+        yield Token(eof, None, length, line_index)
+
+    def fill(self, buffer):
+        """
+        Lex the whole text into a TokenBuffer's columns, EOF included, without a
+        Token per token: a prescanned window goes in as three array copies, only
+        the windows prescan() turns down are lexed token by token. Returns the
+        first SQLError (the buffer then stops where it was found) or None.
+        """
+        for start, stop, scan in self._windows(FILL_WINDOW_CHARS):
+            if scan is None:
+                lexer = self._window_lexer(start, stop)
+                for token in lexer.iter_tokens():
+                    if isinstance(token, SQLError):
+                        self.pos = lexer.pos
+                        return token
+                    if token.type is TokenType.EOF:
+                        break
+                    buffer.append_token(token, lexer.token_start, lexer.token_end)
+                continue
+            buffer.types.frombytes(scan.types[:-1].tobytes())
+            buffer.starts.frombytes((scan.starts[:-1] + start).astype(np.int64).tobytes())
+            buffer.ends.frombytes((scan.ends[:-1] + start).astype(np.int64).tobytes())
+
+        self.pos = self.token_start = self.token_end = self.length
+        buffer.append(TokenType.EOF, self.length, self.length)
+        return None
+
+
+def make_lexer(text):
+    """
+    The lexer validate_query should use for `text` (a str or a bytes-like input):
+    a PrescanLexer when the text is ASCII, long enough and not mostly a few
+    strings (see _sparse_strings), and NumPy is installed; lexer_for(text)
+    otherwise. All of them produce identical tokens and errors.
+    """
+    if text and len(text) >= PRESCAN_MIN_CHARS and _numpy_ready():
+        if not isinstance(text, str):
+            if not is_ascii(text):
+                return lexer_for(text)
+            # an ASCII buffer's decode is a plain copy
+            text = str(text, "ascii")
+        if text.isascii() and not _sparse_strings(text, 0, len(text)):
+            return PrescanLexer(text)
+    return lexer_for(text)
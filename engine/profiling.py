@@ -0,0 +1,161 @@
+import cProfile
+import heapq
+import pstats
+import random
+import time
+import tracemalloc
+from array import array
+from pathlib import Path
+
+from engine.fingerprint import fingerprint
+
+PERCENTILES = (50, 90, 99)
+PROFILE_KINDS = ("cprofile", "tracemalloc")
+PHASES = ("lex_ns", "parse_ns", "total_ns")
+
+# Timings kept for the percentiles: a uniform sample of this many queries (all of
+# them up to that count), so the summary of a long batch stays the same size
+SAMPLE_SIZE = 10_000
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+class ProfileSummary:
+    """
+    Aggregates the per-query "profile" entries of a batch (validate_query(profile=True))
+    into percentile summaries, and keeps the `slowest` queries with their templates so
+    pathological statement shapes stand out.
+    Totals, min and max are exact; percentiles come from a reservoir sample of
+    `sample_size` queries (exact while the batch is no bigger), so memory does
+    not grow with the batch.
+    """
+    def __init__(self, slowest=10, sample_size=SAMPLE_SIZE, seed=0):
+        self.count = 0
+        self.tokens = 0
+        self.bytes = 0
+        self.sums = dict.fromkeys(PHASES, 0)
+        self.mins = dict.fromkeys(PHASES)
+        self.maxes = dict.fromkeys(PHASES, 0)
+        self.samples = {phase: array("q") for phase in PHASES}
+        self._sample_size = sample_size
+        self._random = random.Random(seed)
+        self._slowest = []          # min-heap of (total_ns, index, text, tokens)
+        self._keep = slowest
+
+    def add(self, profile, text=None, index=None):
+        self.count += 1
+        self.tokens += profile["tokens"]
+        self.bytes += profile["bytes"]
+
+        # Algorithm R: once the sample is full, the n-th query replaces a random
+        # sampled one with probability size/n
+        slot = None if self.count <= self._sample_size else self._random.randrange(self.count)
+        for phase in PHASES:
+            value = profile[phase]
+            self.sums[phase] += value
+            if self.mins[phase] is None or value < self.mins[phase]:
+                self.mins[phase] = value
+            if value > self.maxes[phase]:
+                self.maxes[phase] = value
+            if slot is None:
+                self.samples[phase].append(value)
+            elif slot < self._sample_size:
+                self.samples[phase][slot] = value
+
+        entry = (profile["total_ns"], index if index is not None else self.count, text, profile["tokens"])
+        if len(self._slowest) < self._keep:
+            heapq.heappush(self._slowest, entry)
+        elif entry[0] > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def __len__(self):
+        return self.count
+
+    def to_dict(self):
+        seconds = self.sums["total_ns"] / 1e9
+        summary = {
+            "queries": len(self),
+            "tokens": self.tokens,
+            "bytes": self.bytes,
+            "seconds": round(seconds, 6),
+            "stmts_per_sec": round(len(self) / seconds, 1) if seconds else None,
+            "mb_per_sec": round(self.bytes / 1e6 / seconds, 3) if seconds else None,
+        }
+        for name in PHASES:
+            values = sorted(self.samples[name])
+            phase = {f"p{pct}": percentile(values, pct) for pct in PERCENTILES}
+            phase["min"] = self.mins[name] or 0
+            phase["max"] = self.maxes[name]
+            summary[name] = phase
+
+        summary["slowest"] = []
+        for total_ns, index, text, tokens in sorted(self._slowest, reverse=True):
+            template = fingerprint(text)[0] if text is not None else None
+            summary["slowest"].append({
+                "query_index": index,
+                "total_ns": total_ns,
+                "tokens": tokens,
+                "template": template,
+            })
+        return summary
+
+    def format_text(self):
+        summary = self.to_dict()
+        lines = [f"Profiled {summary['queries']} queries, {summary['tokens']} tokens, {summary['bytes']} bytes"]
+        for name, label in (("lex_ns", "Lex"), ("parse_ns", "Parse"), ("total_ns", "Total")):
+            phase = summary[name]
+            cells = " | ".join(f"p{pct} {phase[f'p{pct}'] / 1000:.1f}us" for pct in PERCENTILES)
+            lines.append(f"{label:<6}: {cells} | max {phase['max'] / 1000:.1f}us")
+        for slow in summary["slowest"][:3]:
+            lines.append(f"Slow #{slow['query_index']} ({slow['total_ns'] / 1000:.0f}us) : {slow['template']}")
+        return "\n".join(lines)
+
+
+class RunProfiler:
+    """
+    Wraps a whole run in cProfile or tracemalloc and dumps the result to `out_dir`:
+    a .prof file (open with pstats / snakeviz) or a text list of the top allocation sites.
+    Only the current process is profiled, so run the batch serially under it.
+    """
+    def __init__(self, kind, out_dir, name="run", top=50):
+        if kind not in PROFILE_KINDS:
+            raise ValueError(f"Unknown profile kind: {kind}")
+        self.kind = kind
+        self.out_dir = Path(out_dir)
+        self.name = name
+        self.top = top
+        self.path = None
+        self._profiler = None
+
+    def __enter__(self):
+        if self.kind == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.kind == "cprofile":
+            self._profiler.disable()
+            self.path = self.out_dir / f"{self.name}_{stamp}.prof"
+            pstats.Stats(self._profiler).dump_stats(self.path)
+            return False
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.path = self.out_dir / f"{self.name}_{stamp}_alloc.txt"
+        lines = [f"current {current / 1024:.1f} KB | peak {peak / 1024:.1f} KB", ""]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:self.top]]
+        self.path.write_text("\n".join(lines), encoding="utf-8")
+        return False
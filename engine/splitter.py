@@ -0,0 +1,182 @@
+import codecs
+import re
+
+# Outside a string literal only these two chars change the splitter's state
+BOUNDARY_OR_QUOTE = re.compile(r"[;']")
+NON_WHITESPACE = re.compile(r"\S")
+
+# The same for ASCII bytes chunks; str \s also takes \x1c-\x1f, bytes \s doesn't
+ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+BYTES_BOUNDARY_OR_QUOTE = re.compile(rb"[;']")
+BYTES_NON_WHITESPACE = re.compile(rb"[^\t\n\x0b\x0c\r\x1c-\x1f ]")
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class Statement:
+    """One complete statement cut out of a script, with where it starts."""
+    __slots__ = ("text", "line", "offset", "column")
+
+    def __init__(self, text, line, offset, column=1):
+        self.text = text
+        self.line = line          # 1-based line of the first char of the statement
+        self.offset = offset      # byte offset of the first char of the statement
+        self.column = column      # 1-based column of the first char of the statement
+
+    def source_position(self, line, column):
+        """Map a line/column inside the statement text to one in the whole script."""
+        if line is None:
+            return None, None
+        if line == 1 and column is not None:
+            column += self.column - 1
+        return self.line + line - 1, column
+
+    def __repr__(self):
+        return f"Statement(line {self.line}, byte {self.offset} : {self.text!r})"
+
+
+def _iter_chunks(source, chunk_size):
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        yield source
+    elif hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from source
+
+
+def _ascii_or_text(chunks, encoding):
+    """
+    Pass bytes chunks through as long as they are pure ASCII. From the first chunk
+    with a non-ASCII byte on, everything is decoded (the str / Unicode path).
+    """
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        if decoder is None:
+            if isinstance(chunk, memoryview):
+                chunk = chunk.tobytes()
+            if chunk.isascii():
+                yield chunk
+                continue
+            decoder = codecs.getincrementaldecoder(encoding)()
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    if decoder is not None:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+def _join(parts):
+    """One statement out of its pieces; ASCII bytes pieces met by decoded ones are decoded too."""
+    if isinstance(parts[0], str):
+        return "".join(parts)
+    if not isinstance(parts[-1], str):
+        return b"".join(parts)
+    return "".join(part if isinstance(part, str) else part.decode("ascii") for part in parts)
+
+
+def split_statements(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding="utf-8"):
+    """
+    Yield Statement objects from a script given as a string, a text file object
+    or any iterable of text chunks. ';' only ends a statement outside of a
+    single quoted literal, and only the statement being built is held in memory.
+
+    The script may also come as bytes (a bytes object, a binary file object or
+    bytes chunks): while it is pure ASCII it is split without decoding and the
+    statements' text is bytes, ready for the BytesLexer. At the first non-ASCII
+    byte it switches to decoding with `encoding` and later statements are str.
+    """
+    parts = []              # pieces of the current statement
+    in_quote = False
+    line = 1                # line / byte offset / column of the first char not yet consumed
+    offset = 0
+    column = 1
+    start_line = start_offset = start_column = None
+
+    for chunk in _ascii_or_text(_iter_chunks(source, chunk_size), encoding):
+        if isinstance(chunk, str):
+            ascii_chunk = chunk.isascii()
+            boundary_or_quote, non_whitespace, newline, quote = BOUNDARY_OR_QUOTE, NON_WHITESPACE, "\n", "'"
+        else:
+            ascii_chunk = True
+            boundary_or_quote, non_whitespace, newline, quote = BYTES_BOUNDARY_OR_QUOTE, BYTES_NON_WHITESPACE, b"\n", b"'"
+        pos = 0
+        length = len(chunk)
+
+        while pos < length:
+            if not parts:
+                # Skip the whitespace between statements without keeping it
+                match = non_whitespace.search(chunk, pos)
+                end = match.start() if match else length
+                newlines = chunk.count(newline, pos, end)
+                line += newlines
+                column = end - chunk.rfind(newline, pos, end) if newlines else column + end - pos
+                offset += end - pos if ascii_chunk else len(chunk[pos:end].encode(encoding))
+                pos = end
+                if match is None:
+                    break
+                start_line, start_offset, start_column = line, offset, column
+
+            # Find the end of this statement, or of this chunk
+            boundary = None
+            scan = pos
+            while scan < length:
+                if in_quote:
+                    close = chunk.find(quote, scan)
+                    if close == -1:
+                        scan = length
+                        break
+                    in_quote = False
+                    scan = close + 1
+                    continue
+                match = boundary_or_quote.search(chunk, scan)
+                if match is None:
+                    scan = length
+                    break
+                if match.group() == quote:
+                    in_quote = True
+                    scan = match.end()
+                    continue
+                boundary = match.end()
+                break
+
+            end = boundary if boundary is not None else length
+            parts.append(chunk[pos:end])
+            newlines = chunk.count(newline, pos, end)
+            line += newlines
+            column = end - chunk.rfind(newline, pos, end) if newlines else column + end - pos
+            offset += end - pos if ascii_chunk else len(chunk[pos:end].encode(encoding))
+            pos = end
+
+            if boundary is not None:
+                text = _join(parts)
+                parts = []
+                if len(text) != 1:              # a lone ';'
+                    yield Statement(text, start_line, start_offset, start_column)
+
+    if parts:
+        text = _join(parts)
+        text = text.rstrip() if isinstance(text, str) else text.rstrip(ASCII_WHITESPACE)
+        if text:
+            yield Statement(text, start_line, start_offset, start_column)
+
+
+def split_file(path, chunk_size=DEFAULT_CHUNK_SIZE, encoding="utf-8", raw=False):
+    """
+    split_statements over a file read chunk by chunk (newlines left untouched).
+    With raw the file is read as bytes and an ASCII file is never decoded.
+    """
+    if raw:
+        with open(path, "rb") as f:
+            yield from split_statements(f, chunk_size=chunk_size, encoding=encoding)
+        return
+    with open(path, "r", encoding=encoding, newline="") as f:
+        yield from split_statements(f, chunk_size=chunk_size, encoding=encoding)
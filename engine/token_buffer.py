@@ -0,0 +1,100 @@
+from array import array
+from engine.tokens import TokenType
+from engine.lexer import Token
+from engine.line_index import LineIndex
+
+# TokenType <-> one byte type code stored in the buffer
+TYPE_CODES = {t: t.value for t in TokenType}
+TYPES_BY_CODE = {t.value: t for t in TokenType}
+
+# Token kinds the lexer positions right after the literal instead of at its start
+END_POSITIONED = frozenset({TokenType.NUMBER, TokenType.STRING})
+
+
+class TokenBuffer:
+    """
+    Struct-of-arrays token storage: type codes and source offsets live in `array`
+    columns, values are sliced out of the source text and line/column looked up
+    in the source's LineIndex on demand.
+    Indexing or iterating gives ordinary Token views, so it can stand in for a
+    token list anywhere (Parser, build_text_report, cli show_tokens).
+    """
+    __slots__ = ("source", "types", "starts", "ends", "line_index")
+
+    def __init__(self, source, line_index=None):
+        self.source = source
+        self.types = array("B")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.line_index = line_index if line_index is not None else LineIndex(source)
+
+    @classmethod
+    def from_lexer(cls, lexer):
+        """Tokenize everything a RegexLexer produces. Returns (buffer, SQLError or None)."""
+        buffer = cls(lexer.text, lexer.line_index)
+        if hasattr(lexer, "fill"):
+            # a PrescanLexer writes its arrays straight into the columns
+            return buffer, lexer.fill(buffer)
+        for token in lexer.iter_tokens():
+            if not isinstance(token, Token):
+                return buffer, token
+            buffer.append_token(token, lexer.token_start, lexer.token_end)
+        return buffer, None
+
+    def append(self, token_type, start, end):
+        self.types.append(TYPE_CODES[token_type])
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def append_token(self, token, start, end):
+        """Store a Token by its source span; its value and position are rebuilt from the span later."""
+        self.append(token.type, start, end)
+
+    def type_at(self, index):
+        return TYPES_BY_CODE[self.types[index]]
+
+    def value_at(self, index):
+        """Re-create the Token value from the source slice, like the lexer does."""
+        token_type = TYPES_BY_CODE[self.types[index]]
+        start, end = self.starts[index], self.ends[index]
+
+        if token_type == TokenType.EOF:
+            return None
+        if token_type == TokenType.STRING:
+            return self.text_at(start + 1, end - 1)     # without the quotes
+        if token_type == TokenType.NUMBER:
+            text = self.text_at(start, end)
+            return float(text) if "." in text else int(text)
+        return self.text_at(start, end)
+
+    def text_at(self, start, end):
+        """Source text of a span; slices of an ASCII bytes source (BytesLexer) are decoded here."""
+        text = self.source[start:end]
+        return text if isinstance(text, str) else str(text, "ascii")
+
+    def offset_at(self, index):
+        """Offset the token is reported at (see END_POSITIONED)."""
+        if TYPES_BY_CODE[self.types[index]] in END_POSITIONED:
+            return self.ends[index]
+        return self.starts[index]
+
+    def position_at(self, index):
+        """(line, column) of a token, as the lexer reports it."""
+        return self.line_index.position(self.offset_at(index))
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return Token(self.type_at(index), self.value_at(index), self.offset_at(index), self.line_index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return f"TokenBuffer({len(self)} tokens)"
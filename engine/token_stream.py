@@ -0,0 +1,107 @@
+import time
+from collections import deque
+from engine.tokens import TokenType
+from engine.lexer import Token
+from engine.token_buffer import TokenBuffer
+from engine.exceptions import SQLError
+
+
+class TokenStream:
+    """
+    Feeds the Parser straight from a lexer's iter_tokens() generator.
+    Only a small lookahead buffer is held, so parsing runs while lexing is still
+    going on and a syntax error stops the run without lexing the rest of the text.
+    """
+    def __init__(self, source, keep_history=True, recover=False, timed=False):
+        """
+        recover: keep lexing past lexer errors (RegexLexer.iter_tokens(recover=True)).
+        The errors are collected in lex_errors and the parser never sees them.
+        timed: add up the time spent inside the lexer in lex_ns (profiling).
+        """
+        if recover:
+            self._source = source.iter_tokens(recover=True)
+        else:
+            self._source = source.iter_tokens() if hasattr(source, "iter_tokens") else iter(source)
+        self.lex_ns = 0
+        if timed:
+            self._source = self._timed(self._source)
+        self._recover = recover
+        self.lex_errors = []
+        # RegexLexer reports token spans, so its history can go into a compact TokenBuffer
+        self._lexer = source if hasattr(source, "token_start") else None
+        self._line_index = getattr(source, "line_index", None)
+        self._buffer = deque()
+        self._eof = None
+        self.lex_error = None
+
+        # tokens lexed so far
+        if not keep_history:
+            self.tokens = None
+        elif self._lexer is not None:
+            self.tokens = TokenBuffer(self._lexer.text, self._line_index)
+        else:
+            self.tokens = []
+
+    def _timed(self, source):
+        clock = time.perf_counter_ns
+        while True:
+            start = clock()
+            item = next(source, None)
+            self.lex_ns += clock() - start
+            if item is None:
+                return
+            yield item
+
+    def _pull(self):
+        """Fetch one item from the lexer, turning a lexer error into an EOF stand-in."""
+        if self._eof is not None:
+            return self._eof
+
+        item = next(self._source, None)
+        while self._recover and isinstance(item, SQLError):
+            if self.lex_error is None:
+                self.lex_error = item
+            self.lex_errors.append(item)
+            item = next(self._source, None)
+
+        if item is None or isinstance(item, SQLError):
+            if not self._recover:
+                self.lex_error = item
+            # The parser winds down on this fake EOF, validate_query reports the lexer error
+            self._eof = self._fake_eof(item)
+            return self._eof
+
+        if self.tokens is not None:
+            if self._lexer is not None:
+                self.tokens.append_token(item, self._lexer.token_start, self._lexer.token_end)
+            else:
+                self.tokens.append(item)
+
+        if item.type == TokenType.EOF:
+            self._eof = item
+        return item
+
+    def _fake_eof(self, error):
+        """EOF token placed where the lexer `error` is (nowhere when lexing just ran out)."""
+        line_index = self._line_index
+        if line_index is None and self.tokens:
+            # a bare token generator: its tokens know their source
+            line_index = self.tokens[-1].line_index
+        if error is None or line_index is None or error.line is None:
+            return Token(TokenType.EOF, None, None, None)
+        return Token(TokenType.EOF, None, line_index.offset(error.line, error.column), line_index)
+
+    def peek(self, offset=0):
+        """Look at the token `offset` places ahead without consuming it."""
+        while len(self._buffer) <= offset:
+            self._buffer.append(self._pull())
+        return self._buffer[offset]
+
+    def next(self):
+        """Consume and return the next token. Keeps returning EOF once the input is done."""
+        return self._buffer.popleft() if self._buffer else self._pull()
+
+    def drain(self):
+        """Lex whatever the parser did not need, so trailing lexer errors still surface."""
+        while self.next().type != TokenType.EOF:
+            pass
@@ -29,6 +29,8 @@ class TokenType(Enum):
     ORDER = auto()
     HAVING = auto()
     LIMIT = auto()
+    ASC = auto()
+    DESC = auto()
     AS = auto()
     DISTINCT = auto()
     AND = auto()
@@ -50,6 +52,7 @@ class TokenType(Enum):
     IDENTIFIER = auto()  # Table names, column names
     NUMBER = auto()      # 10, 3.14
     STRING = auto()      # 'Hello' or "World"
+    PLACEHOLDER = auto() # ?, :name, $1
 
     # --- Operators & Punctuation ---
     ASTERISK = auto()    # *
@@ -94,6 +97,8 @@ KEYWORDS = {
     'ORDER': TokenType.ORDER,
     'HAVING': TokenType.HAVING,
     'LIMIT': TokenType.LIMIT,
+    'ASC': TokenType.ASC,
+    'DESC': TokenType.DESC,
     'AS': TokenType.AS,
     'DISTINCT': TokenType.DISTINCT,
     'AND': TokenType.AND,
@@ -0,0 +1,44 @@
+import logging
+
+logger = logging.getLogger("SQLValidator")
+
+
+class Tracer:
+    """
+    Switch for the per-token parser trace. Hot paths only test `active`, so with
+    tracing off a matched token costs one attribute check and no string building;
+    messages are %-formatted by logging only when a record is actually emitted.
+
+    sample_every=N traces one statement in N (decided in begin_statement).
+    """
+    __slots__ = ("enabled", "active", "sample_every", "statements")
+
+    def __init__(self):
+        self.enabled = False
+        self.active = False
+        self.sample_every = 1
+        self.statements = 0
+
+    def configure(self, enabled=True, sample_every=1):
+        self.enabled = enabled
+        self.sample_every = max(1, int(sample_every))
+        self.statements = 0
+        self.active = False
+
+    def begin_statement(self):
+        """Decide whether the statement about to be validated is traced."""
+        if not self.enabled:
+            self.active = False
+            return False
+        self.active = self.statements % self.sample_every == 0
+        self.statements += 1
+        return self.active
+
+    def end_statement(self):
+        self.active = False
+
+    def event(self, msg, *args):
+        logger.debug(msg, *args)
+
+
+TRACER = Tracer()
@@ -1,89 +1,481 @@
-from engine.lexer import Lexer
+import os
+import time
+from collections import deque
+from itertools import chain, islice
+from engine.prescan import make_lexer
+from engine.line_index import LineIndex
 from engine.parser import Parser
+from engine.token_stream import TokenStream
+from engine.token_buffer import TokenBuffer
+from engine.tokens import TokenType
 from engine.exceptions import SQLError
+from engine.cache import ResultCache, DEFAULT_CACHE_SIZE, query_hash
+from engine.fingerprint import fingerprint
+from engine.tracing import TRACER
+
+# Queries sent to a worker process per task in batch mode
+DEFAULT_CHUNK_SIZE = 256
+
+
+# Distinct templates remembered by each worker process
+TEMPLATE_CACHE_SIZE = 50_000
+_template_cache = None
+
+
+def _validate_chunk(queries, keep_tokens=False, templates=False, profile=False):
+    """Worker side of ValidatorEngine.iter_batch: validate a chunk, send back compact results."""
+    if profile:
+        return [
+            ValidatorEngine.compact_result(ValidatorEngine.validate_query(query, build_ast=False, profile=True), keep_tokens)
+            for query in queries
+        ]
+
+    if templates:
+        global _template_cache
+        if _template_cache is None:
+            _template_cache = ResultCache(TEMPLATE_CACHE_SIZE)
+        return [
+            ValidatorEngine.validate_by_template(query, _template_cache, keep_tokens)
+            for query in queries
+        ]
+
+    return [
+        ValidatorEngine.compact_result(ValidatorEngine.validate_query(query, build_ast=False), keep_tokens)
+        for query in queries
+    ]
+
 
 class ValidatorEngine:
     @staticmethod
-    def validate_query(sql_text):
-   
-    
-        lexer = Lexer(sql_text)
-        tokens = []
+    def validate_query(sql_text, cache=None, build_ast=True, recover=False, profile=False):
+        """
+        Lexes and parses in one streaming pass: the Parser pulls tokens from the
+        lexer as it needs them, so an early syntax error skips lexing the rest.
+        Long ASCII texts are the exception: the prescan lexes them in bulk into a
+        TokenBuffer first (see _lex_in_bulk), ~20x faster on a 100k-row INSERT.
+        The whole text is checked (see Parser.parse_script), so it gets the same
+        verdict as with recover; only the first error is reported.
+        A VALID result carries the statement's AST under "ast" unless build_ast is
+        off (a list of them when the text holds several statements).
+        sql_text may also be bytes / bytearray / memoryview: pure ASCII input is
+        lexed without being decoded (see engine.lexer.BytesLexer).
+
+        With a ResultCache the call is status-only: it returns the compact result
+        (tokens None, no AST) and repeated texts are served from the cache.
+
+        With recover, the text is validated as a whole script with error recovery
+        (see Parser.parse_script): "errors" lists every lexer and syntax error in
+        source order, "error" is the first of them and a VALID "ast" is the list
+        of statements.
+
+        With profile, the result gets a "profile" entry: lex and parse wall time
+        (perf_counter_ns), token count and input size in bytes. Profiled calls
+        always do the work, the cache is not consulted.
+        """
+        if recover:
+            return ValidatorEngine._validate_script(sql_text, build_ast, profile)
+
+        if cache is not None and not profile:
+            key = query_hash(sql_text)
+            cached = cache.get(key)
+            if cached is None:
+                cached = ValidatorEngine.compact_result(ValidatorEngine.validate_query(sql_text, build_ast=False))
+                cache.put(key, cached)
+            return dict(cached)
+
+        start = time.perf_counter_ns() if profile else 0
+        lexer = make_lexer(sql_text)
+        tokens, lex_error, lex_ns = ValidatorEngine._lex_in_bulk(lexer, profile)
+
+        # Sampled tracing: only every Nth statement pays for the per-token trace
+        if TRACER.enabled:
+            TRACER.begin_statement()
+
+        if tokens is not None:
+            result = ValidatorEngine._validate_buffer(tokens, lex_error, build_ast)
+            TRACER.end_statement()
+            if profile:
+                result["profile"] = ValidatorEngine._profile_entry(sql_text, tokens, lex_ns, start)
+            return result
+
+        stream = TokenStream(lexer, timed=profile)
+
+        # ---------- PARSING (drives the lexer) ----------
+        parser = Parser(stream, build_ast=build_ast)
+        parse_result = parser.parse_script(recover=False)
+        if isinstance(parse_result, list) and len(parse_result) == 1:
+            parse_result = parse_result[0]
+        TRACER.end_statement()
 
         # ---------- LEXING ----------
-        while True:
-            token = lexer.get_next_token()
-            
-            # Lexer error
-            if isinstance(token, SQLError):
-                return {
-                    "status": "INVALID",
-                    "phase": "LEXING",
-                    "error": {
-                        "message": token.msg,
-                        "line": token.line,
-                        "column": token.column,
-                        "hint": token.detail
-                    },
-                    "tokens": None
-                }
-
-            tokens.append(token)
-            if token.type.name == 'EOF':
-                break
-
-        # ---------- PARSING ----------
-        parser = Parser(tokens)
-        parse_result = parser.parse()
+        # Lexer error
+        if stream.lex_error is not None:
+            result = ValidatorEngine._invalid_result("LEXING", stream.lex_error, None)
 
-        if isinstance(parse_result, SQLError):
-            return {
-                "status": "INVALID",
-                "phase": "PARSING",
-                "error": {
-                    "message": parse_result.msg,
-                    "line": parse_result.line,
-                    "column": parse_result.column,
-                    "hint": parse_result.detail
-                },
-                "tokens": tokens
-            }
+        elif isinstance(parse_result, SQLError):
+            # tokens only covers what was lexed before the parser gave up
+            result = ValidatorEngine._invalid_result("PARSING", parse_result, stream.tokens)
 
         # ---------- SUCCESS ----------
+        else:
+            result = ValidatorEngine._valid_result(stream.tokens, parse_result if build_ast else None)
+
+        if profile:
+            result["profile"] = ValidatorEngine._profile_entry(sql_text, stream.tokens, lex_ns + stream.lex_ns, start)
+        return result
+
+    @staticmethod
+    def _lex_in_bulk(lexer, timed=False):
+        """
+        (TokenBuffer, lexer error or None, lex time in ns) when `lexer` can fill a
+        buffer in bulk (a PrescanLexer, see make_lexer); (None, None, 0) otherwise.
+        Parsing an indexed buffer lets long literal lists be matched on its type
+        codes (Parser._skip_value_run / _skip_value_rows) instead of going by one
+        Token at a time through a TokenStream. After a lexer error the buffer ends
+        with an EOF stand-in where it was found, as a TokenStream's does.
+        """
+        if not hasattr(lexer, "fill"):
+            return None, None, 0
+        start = time.perf_counter_ns() if timed else 0
+        tokens, lex_error = TokenBuffer.from_lexer(lexer)
+        if lex_error is not None:
+            tokens.append(TokenType.EOF, lexer.pos, lexer.pos)
+        lex_ns = time.perf_counter_ns() - start if timed else 0
+        return tokens, lex_error, lex_ns
+
+    @staticmethod
+    def _validate_buffer(tokens, lex_error, build_ast):
+        """validate_query's verdict for a text _lex_in_bulk has lexed."""
+        parser = Parser(tokens, build_ast=build_ast)
+        parse_result = parser.parse_script(recover=False)
+        # Streaming, the lexer error only comes up once the parser reaches the EOF stand-in
+        if lex_error is not None and (not isinstance(parse_result, SQLError) or parser.pos >= len(tokens) - 1):
+            return ValidatorEngine._invalid_result("LEXING", lex_error, None)
+        if isinstance(parse_result, SQLError):
+            return ValidatorEngine._invalid_result("PARSING", parse_result, tokens)
+        if len(parse_result) == 1:
+            parse_result = parse_result[0]
+        return ValidatorEngine._valid_result(tokens, parse_result if build_ast else None)
+
+    @staticmethod
+    def _profile_entry(sql_text, tokens, lex_ns, start):
+        total = time.perf_counter_ns() - start
+        return {
+            "lex_ns": lex_ns,
+            "parse_ns": total - lex_ns,
+            "total_ns": total,
+            "tokens": len(tokens),
+            "bytes": len(sql_text.encode("utf-8", "surrogatepass")) if isinstance(sql_text, str) else memoryview(sql_text).nbytes,
+        }
+
+    @staticmethod
+    def _validate_script(sql_text, build_ast=True, profile=False):
+        """validate_query(recover=True): one pass that reports every error."""
+        start = time.perf_counter_ns() if profile else 0
+        lexer = make_lexer(sql_text)
+        tokens, lex_error, lex_ns = ValidatorEngine._lex_in_bulk(lexer, profile)
+        if TRACER.enabled:
+            TRACER.begin_statement()
+        if tokens is not None and lex_error is None:
+            parser = Parser(tokens, build_ast=build_ast)
+            lex_errors = []
+        else:
+            # recovery lexes on past every error, which only the stream does
+            stream = TokenStream(lexer, recover=True, timed=profile)
+            parser = Parser(stream, build_ast=build_ast)
+            tokens, lex_errors = stream.tokens, stream.lex_errors
+        statements = parser.parse_script()
+        TRACER.end_statement()
+        if parser.stream is not None:
+            lex_ns += parser.stream.lex_ns
+
+        result = ValidatorEngine._script_result(tokens, statements, lex_errors, parser.errors, build_ast)
+        if profile:
+            result["profile"] = ValidatorEngine._profile_entry(sql_text, tokens, lex_ns, start)
+        return result
+
+    @staticmethod
+    def _script_result(tokens, statements, lex_errors, parse_errors, build_ast):
+        """Result of a script checked with recovery: every error, in source order."""
+        errors = [("LEXING", error) for error in lex_errors]
+        errors += [("PARSING", error) for error in parse_errors]
+        if not errors:
+            return ValidatorEngine._valid_result(tokens, statements if build_ast else None)
+
+        errors.sort(key=lambda item: (item[1].line or 0, item[1].column or 0))
+        phase, first = errors[0]
+        result = ValidatorEngine._invalid_result(phase, first, tokens)
+        result["errors"] = [ValidatorEngine._error_entry(phase, error) for phase, error in errors]
+        return result
+
+    @staticmethod
+    def validate_tokens(tokens, lex_error=None, build_ast=True, recover=False):
+        """
+        validate_query for text that is already lexed (tokens up to EOF): the
+        whole buffer is parsed, with recover every syntax error is reported.
+        A lexer error wins over any parse error, as the tokens end where it was found.
+        An IncrementalLexer is better served by validate_session.
+        """
+        if lex_error is not None:
+            return ValidatorEngine._invalid_result("LEXING", lex_error, None)
+
+        parser = Parser(tokens, build_ast=build_ast)
+        if recover:
+            statements = parser.parse_script()
+            return ValidatorEngine._script_result(tokens, statements, [], parser.errors, build_ast)
+
+        parse_result = parser.parse_script(recover=False)
+        if isinstance(parse_result, SQLError):
+            return ValidatorEngine._invalid_result("PARSING", parse_result, tokens)
+        if len(parse_result) == 1:
+            parse_result = parse_result[0]
+        return ValidatorEngine._valid_result(tokens, parse_result if build_ast else None)
+
+    @staticmethod
+    def validate_session(session, build_ast=False):
+        """
+        validate_query(recover=True) for the text an IncrementalLexer holds, from
+        its tokens. Only the statements edited since the session was last
+        validated are parsed again (see IncrementalLexer.parse_script); a lexer
+        error ends the check, as lexing stopped there.
+        """
+        statements, parse_errors = session.parse_script(build_ast)
+        lex_errors = [session.error] if session.error is not None else []
+        return ValidatorEngine._script_result(session.tokens, statements, lex_errors, parse_errors, build_ast)
+
+    @staticmethod
+    def _invalid_result(phase, error, tokens):
+        return {
+            "status": "INVALID",
+            "phase": phase,
+            "error": {
+                "message": error.msg,
+                "line": error.line,
+                "column": error.column,
+                "hint": error.detail
+            },
+            "errors": [ValidatorEngine._error_entry(phase, error)],
+            "tokens": tokens,
+            "ast": None
+        }
+
+    @staticmethod
+    def _error_entry(phase, error):
+        return {
+            "phase": phase,
+            "message": error.msg,
+            "line": error.line,
+            "column": error.column,
+            "hint": error.detail
+        }
+
+    @staticmethod
+    def _valid_result(tokens, ast=None):
         return {
             "status": "VALID",
             "phase": "COMPLETE",
             "error": None,
-            "tokens": tokens
+            "errors": [],
+            "tokens": tokens,
+            "ast": ast
         }
 
+    @staticmethod
+    def compact_result(result, keep_tokens=False):
+        """
+        Shrinks a validate_query result for batch use: the Token list is replaced by
+        its length (or kept as the compact TokenBuffer when keep_tokens is set).
+        An INVALID result has no token_count (None): the streaming and template
+        paths stop lexing at different points after an error.
+        """
+        tokens = result["tokens"]
+        compact = {
+            "status": result["status"],
+            "phase": result["phase"],
+            "error": result["error"],
+            "token_count": len(tokens) if result["status"] == "VALID" else None,
+            "tokens": tokens if keep_tokens else None
+        }
+        if "profile" in result:
+            compact["profile"] = result["profile"]
+        return compact
+
+    @staticmethod
+    def validate_by_template(sql_text, template_cache, keep_tokens=False):
+        """
+        Status-only validation that parses each literal-stripped template once
+        (see engine.fingerprint). Statements sharing a VALID template reuse that
+        result; invalid ones are parsed again from their own tokens (the ones the
+        fingerprint lexed, not a second lexing pass) so the error location is
+        still theirs. The compact result carries its "template".
+        """
+        template, tokens = fingerprint(sql_text)
+        if template is None:
+            result = ValidatorEngine.compact_result(ValidatorEngine.validate_query(sql_text, build_ast=False), keep_tokens)
+            result["template"] = None
+            return result
+
+        key = query_hash(template)
+        known = template_cache.get(key)
+        parse_result = None
+        if known is None:
+            parse_result = Parser(tokens, build_ast=False).parse_script(recover=False)
+            known = "INVALID" if isinstance(parse_result, SQLError) else "VALID"
+            template_cache.put(key, known)
+
+        if known == "INVALID":
+            if isinstance(parse_result, SQLError):
+                # first statement of this template: its own parse already has the error
+                result = ValidatorEngine._invalid_result("PARSING", parse_result, tokens)
+            else:
+                result = ValidatorEngine.validate_tokens(tokens, build_ast=False)
+            result = ValidatorEngine.compact_result(result, keep_tokens)
+        else:
+            result = {
+                "status": "VALID",
+                "phase": "COMPLETE",
+                "error": None,
+                "token_count": len(tokens),
+                "tokens": tokens if keep_tokens else None
+            }
+        result["template"] = template
+        return result
 
     @staticmethod
-    def batch_validate(queries):
+    def iter_batch(queries, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, keep_tokens=False,
+                   cache=None, cache_size=DEFAULT_CACHE_SIZE, templates=True, profile=False):
+        """
+        Validates an iterable of queries (strings, or objects with a .text such as
+        splitter Statements) on a process pool and yields (query, compact_result)
+        pairs in the original order. Chunks are submitted as the input is read, with
+        at most two per worker in flight, so the input is never held in full.
+
+        Repeated queries are answered from an LRU ResultCache (the given `cache`, or
+        a fresh one of `cache_size`), so only misses reach the workers. The cache is
+        skipped when keep_tokens is set or cache_size is 0.
+
+        With `templates`, workers parse each distinct literal-stripped template once
+        and every result carries its "template" (see validate_by_template).
+
+        With `profile`, every statement is really lexed and parsed (no cache, no
+        templates) and its result carries the "profile" entry of validate_query;
+        feed them to engine.profiling.ProfileSummary for percentiles.
+        """
+        if profile:
+            templates = False
+        if keep_tokens or profile:
+            cache = None
+        elif cache is None and cache_size:
+            cache = ResultCache(cache_size)
+
+        workers = workers or os.cpu_count() or 1
+        items = iter(queries)
+        chunks = iter(lambda: list(islice(items, chunk_size)), [])
+
+        first = next(chunks, [])
+        # A single worker or a single chunk isn't worth starting a pool for
+        pool = None
+        if workers > 1 and len(first) == chunk_size:
+            # imported here: multiprocessing alone is a good part of a cold start
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=workers)
+        pending = deque()
+
+        try:
+            for chunk in chain([first], chunks):
+                results, misses = ValidatorEngine._lookup_chunk([getattr(q, "text", q) for q in chunk], cache)
+                miss_texts = [text for text, _ in misses.values()]
+
+                if pool is None:
+                    validated = _validate_chunk(miss_texts, keep_tokens, templates, profile)
+                    yield from zip(chunk, ValidatorEngine._fill_chunk(results, misses, validated, cache))
+                    continue
+
+                future = pool.submit(_validate_chunk, miss_texts, keep_tokens, templates, profile) if miss_texts else None
+                pending.append((chunk, results, misses, future))
+
+                if len(pending) >= workers * 2:
+                    done_chunk, results, misses, future = pending.popleft()
+                    validated = future.result() if future is not None else []
+                    yield from zip(done_chunk, ValidatorEngine._fill_chunk(results, misses, validated, cache))
+
+            while pending:
+                done_chunk, results, misses, future = pending.popleft()
+                validated = future.result() if future is not None else []
+                yield from zip(done_chunk, ValidatorEngine._fill_chunk(results, misses, validated, cache))
+        finally:
+            if pool is not None:
+                # chunks not started yet are dropped (shutdown(cancel_futures=True) is 3.9+)
+                for _, _, _, future in pending:
+                    if future is not None:
+                        future.cancel()
+                pool.shutdown()
+
+    @staticmethod
+    def _lookup_chunk(texts, cache):
+        """
+        Fills in the cached results of a chunk. Returns (results, misses) where misses
+        maps a key to (text, positions) for every distinct query still to validate.
+        """
+        results = [None] * len(texts)
+        misses = {}
+
+        for position, text in enumerate(texts):
+            if cache is None:
+                misses[position] = (text, [position])
+                continue
+
+            key = query_hash(text)
+            if key in misses:
+                misses[key][1].append(position)
+                continue
+
+            cached = cache.get(key)
+            if cached is not None:
+                results[position] = dict(cached)
+            else:
+                misses[key] = (text, [position])
+
+        return results, misses
+
+    @staticmethod
+    def _fill_chunk(results, misses, validated, cache):
+        """Slots freshly validated results into a chunk and remembers them in the cache."""
+        for (key, (text, positions)), result in zip(misses.items(), validated):
+            if cache is not None:
+                cache.put(key, result)
+            for position in positions:
+                results[position] = dict(result)
+        return results
+
+    @staticmethod
+    def batch_validate(queries, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, cache=None):
         """Processes a list of queries and categorizes them into successes and errors."""
         results = []
         errors = []
         
-        for idx, query in enumerate(queries, start=1):
-            status, tokens = ValidatorEngine.validate_query(query)
-            
-            if isinstance(status, SQLError):
+        batch = ValidatorEngine.iter_batch(queries, workers=workers, chunk_size=chunk_size, cache=cache)
+        for idx, (query, result) in enumerate(batch, start=1):
+            if result["status"] == "INVALID":
+                err = result["error"]
                 errors.append({
                     "query_index": idx,
                     "query": query,
-                    "message": status.msg,
-                    "line": status.line,
-                    "column": status.column,
-                    "hint": status.detail
+                    "phase": result["phase"],
+                    "message": err["message"],
+                    "line": err["line"],
+                    "column": err["column"],
+                    "hint": err["hint"]
                 })
             else:
                 results.append({
                     "query_index": idx,
                     "query": query,
-                    "tokens": [{"type": t.type.name, "value": str(t.value)} for t in tokens]
+                    "token_count": result["token_count"]
                 })
         
         return results, errors
+
     @staticmethod
     def build_text_report(result, query):
         """Creates formatted text output for files."""
@@ -104,15 +496,34 @@ class ValidatorEngine:
             report.append(f"Message : {err['message']}")
             report.append(f"Line    : {err['line']}")
             report.append(f"Column  : {err['column']}")
+            if err["line"] is not None and query:
+                # the offending line, with a caret under the error column
+                line_index = getattr(result.get("tokens"), "line_index", None) or LineIndex(query)
+                if err["line"] <= len(line_index):
+                    excerpt, caret = line_index.excerpt(err["line"], err["column"])
+                    report.append(f"Source  : {excerpt}")
+                    report.append(" " * (10 + caret) + "^")
             report.append(f"Hint    : {err['hint']}")
+
+            # a recovered script run lists the rest of its errors too
+            others = result.get("errors", [])[1:]
+            if others:
+                report.append(f"\nMORE ERRORS ({len(others)})")
+                report.append("-" * 40)
+                for other in others:
+                    report.append(f"[{other['phase']}] Line {other['line']}, Col {other['column']} : {other['message']}")
             return "\n".join(report)
 
         # If VALID → show tokens ⭐
         report.append("\nLEXING OUTPUT (TOKENS)")
         report.append("-" * 40)
 
-        for t in result["tokens"]:
-            report.append(f"{t.type.name:<15} -> {t.value}")
+        if result["tokens"] is None:
+            # compact batch result without its tokens
+            report.append(f"Token count : {result['token_count']}")
+        else:
+            for t in result["tokens"]:
+                report.append(f"{t.type.name:<15} -> {t.value}")
 
         report.append("\nPARSING RESULT : SUCCESS")
 
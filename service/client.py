@@ -0,0 +1,95 @@
+"""
+Blocking client for the validation daemon (service/server.py), for deploy hooks and scripts.
+
+    python service/client.py "SELECT a FROM t;"          # exit code 1 if invalid
+    python service/client.py --socket /tmp/sqlvalidator.sock < statements.sql
+"""
+import argparse
+import itertools
+import json
+import socket
+import sys
+
+# Kept free of engine imports, so a hook calling the client starts fast
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7878
+
+
+def parse_address(value):
+    """HOST:PORT (or :PORT) -> (host, port)"""
+    host, _, port = value.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+class ServiceError(Exception):
+    """The daemon rejected a request."""
+
+
+class ServiceClient:
+    """One persistent connection to the daemon; each call is one JSON-lines round trip."""
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, timeout=None):
+        if unix_socket:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(unix_socket)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rwb")
+        self._ids = itertools.count(1)
+
+    def request(self, payload):
+        payload = dict(payload, id=next(self._ids))
+        self._file.write(json.dumps(payload).encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ServiceError("Connection closed by the service")
+        response = json.loads(line)
+        if "error" in response:
+            raise ServiceError(response["error"])
+        return response
+
+    def validate(self, sql, recover=False):
+        return self.request({"sql": sql, "recover": recover})["result"]
+
+    def validate_batch(self, statements, recover=False):
+        return self.request({"batch": list(statements), "recover": recover})["results"]
+
+    def ping(self):
+        return self.request({"op": "ping"}).get("ok", False)
+
+    def stats(self):
+        return self.request({"op": "stats"})["stats"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate SQL through a running validation daemon")
+    parser.add_argument("sql", nargs="?", help="SQL text (read from stdin when left out)")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--tcp", default=f"{DEFAULT_HOST}:{DEFAULT_PORT}", help="HOST:PORT of the daemon")
+    where.add_argument("--socket", help="Unix socket path of the daemon")
+    parser.add_argument("--recover", action="store_true", help="report every error of a script")
+    args = parser.parse_args(argv)
+
+    sql = args.sql if args.sql is not None else sys.stdin.read()
+    host, port = parse_address(args.tcp)
+    with ServiceClient(host, port, unix_socket=args.socket) as client:
+        result = client.validate(sql, recover=args.recover)
+
+    print(json.dumps(result, indent=2))
+    return 0 if result["status"] == "VALID" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Long-running validation daemon speaking JSON lines over localhost TCP or a Unix socket.
+
+    python service/server.py --tcp 127.0.0.1:7878
+    python service/server.py --socket /tmp/sqlvalidator.sock
+
+One JSON object per line in, one per line out (matched up by "id"):
+
+    {"id": 1, "sql": "SELECT a FROM t;"}                  -> {"id": 1, "result": {...}}
+    {"id": 2, "batch": ["SELECT a FROM t;", "DELETE t"]}  -> {"id": 2, "results": [{...}, {...}]}
+    {"id": 3, "sql": "...", "recover": true}              -> every error of a script (see validate_query)
+    {"id": 4, "op": "ping"} / {"id": 5, "op": "stats"}
+
+Results are validate_query results without the tokens and AST: status, phase,
+error, errors and token_count (None when INVALID). Requests from every connection (and pipelined
+requests on one connection) are coalesced into micro-batches: whatever arrived
+while the previous batch was validated goes out as the next one.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from utils.logger import setup_logger
+from engine.cache import ResultCache, DEFAULT_CACHE_SIZE, query_hash
+from engine.validator import ValidatorEngine
+from service.client import DEFAULT_HOST, DEFAULT_PORT, parse_address
+
+MAX_BATCH = 1024                    # statements validated per micro-batch
+MAX_LINE = 64 * 1024 * 1024         # longest request line accepted
+MAX_PENDING_PER_CLIENT = 1024       # pipelined requests in flight per connection
+
+logger = logging.getLogger("SQLValidator")
+
+
+def _service_result(result):
+    """validate_query result -> the JSON-safe shape sent to clients."""
+    tokens = result["tokens"]
+    return {
+        "status": result["status"],
+        "phase": result["phase"],
+        "error": result["error"],
+        "errors": result["errors"],
+        "token_count": len(tokens) if result["status"] == "VALID" else None,
+    }
+
+
+def _validate_texts(texts, recover=False):
+    """Executor side of a micro-batch (module level so worker processes can run it)."""
+    return [
+        _service_result(ValidatorEngine.validate_query(text, build_ast=False, recover=recover))
+        for text in texts
+    ]
+
+
+class ValidationService:
+    """
+    Coalesces concurrent validate() calls into micro-batches and runs each batch
+    off the event loop: on one thread, or split over `workers` processes.
+    Plain (non-recover) results are remembered in an LRU ResultCache.
+    """
+    def __init__(self, workers=1, max_batch=MAX_BATCH, cache_size=DEFAULT_CACHE_SIZE):
+        self.workers = max(1, workers)
+        self.max_batch = max_batch
+        self.cache = ResultCache(cache_size)
+        self.executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else ThreadPoolExecutor(1)
+        self.requests = 0
+        self.batches = 0
+        self.statements = 0
+        self._queue = None
+        self._batcher = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.get_running_loop().create_task(self._run_batches())
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        # a micro-batch is at most one task per worker, there is no queue to cancel
+        self.executor.shutdown()
+
+    async def validate(self, texts, recover=False):
+        """Queue `texts` for the next micro-batch and wait for their results."""
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        await self._queue.put((texts, recover, future))
+        return await future
+
+    async def _run_batches(self):
+        while True:
+            batch = [await self._queue.get()]
+            count = len(batch[0][0])
+            while count < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                batch.append(item)
+                count += len(item[0])
+
+            try:
+                await self._run_batch(batch)
+            except Exception as exc:
+                logger.exception("Micro-batch failed")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    async def _run_batch(self, batch):
+        self.batches += 1
+        plain = [text for texts, recover, _ in batch if not recover for text in texts]
+        scripts = [text for texts, recover, _ in batch if recover for text in texts]
+        self.statements += len(plain) + len(scripts)
+
+        # Cached statements are answered here, the rest go to the executor once per distinct text
+        known = {}
+        misses = {}
+        for text in plain:
+            key = query_hash(text)
+            if key in known or key in misses:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                known[key] = cached
+            else:
+                misses[key] = text
+
+        validated = await self._validate(list(misses.values()), False)
+        for key, result in zip(misses, validated):
+            self.cache.put(key, result)
+            known[key] = result
+        script_results = iter(await self._validate(scripts, True))
+
+        for texts, recover, future in batch:
+            if future.done():
+                continue
+            if recover:
+                future.set_result([next(script_results) for _ in texts])
+            else:
+                future.set_result([dict(known[query_hash(text)]) for text in texts])
+
+    async def _validate(self, texts, recover):
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        if self.workers == 1 or len(texts) < self.workers * 8:
+            return await loop.run_in_executor(self.executor, _validate_texts, texts, recover)
+
+        size = -(-len(texts) // self.workers)
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, _validate_texts, texts[i:i + size], recover)
+            for i in range(0, len(texts), size)
+        ))
+        return [result for part in parts for result in part]
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "statements": self.statements,
+            "cache": self.cache.stats(),
+        }
+
+    # ---------------- connections ---------------- #
+
+    async def handle_client(self, reader, writer):
+        """One connection: requests may be pipelined, replies come back as each one finishes."""
+        pending = set()
+        slots = asyncio.Semaphore(MAX_PENDING_PER_CLIENT)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._reply(writer, {"id": None, "error": f"Request line longer than {MAX_LINE} bytes"})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                await slots.acquire()
+                task = asyncio.create_task(self._answer(line, writer))
+                pending.add(task)
+                task.add_done_callback(lambda done: (pending.discard(done), slots.release()))
+
+            if pending:
+                await asyncio.gather(*pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _answer(self, line, writer):
+        try:
+            request = json.loads(line)
+        except ValueError as exc:
+            await self._reply(writer, {"id": None, "error": f"Invalid JSON : {exc}"})
+            return
+        if not isinstance(request, dict):
+            await self._reply(writer, {"id": None, "error": "Request must be a JSON object"})
+            return
+
+        request_id = request.get("id")
+        recover = bool(request.get("recover", False))
+        op = request.get("op")
+
+        if op == "ping":
+            response = {"id": request_id, "ok": True}
+        elif op == "stats":
+            response = {"id": request_id, "stats": self.stats()}
+        elif isinstance(request.get("sql"), str):
+            results = await self.validate([request["sql"]], recover)
+            response = {"id": request_id, "result": results[0]}
+        elif isinstance(request.get("batch"), list) and all(isinstance(sql, str) for sql in request["batch"]):
+            results = await self.validate(request["batch"], recover) if request["batch"] else []
+            response = {"id": request_id, "results": results}
+        else:
+            response = {"id": request_id, "error": "Expected \"sql\" (string), \"batch\" (list of strings) or \"op\""}
+        await self._reply(writer, response)
+
+    @staticmethod
+    async def _reply(writer, response):
+        if not writer.is_closing():
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, workers=1, ready=None):
+    """Run the daemon until cancelled. `ready` (an asyncio.Event) is set once it is listening."""
+    service = ValidationService(workers=workers)
+    service.start()
+
+    if unix_socket:
+        server = await asyncio.start_unix_server(service.handle_client, path=unix_socket, limit=MAX_LINE)
+        where = unix_socket
+    else:
+        server = await asyncio.start_server(service.handle_client, host, port, limit=MAX_LINE)
+        where = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"SQL validation service listening on {where}", flush=True)
+    if ready is not None:
+        ready.set()
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+        if unix_socket:
+            Path(unix_socket).unlink(missing_ok=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQL validation daemon (JSON lines)")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--tcp", default=f"{DEFAULT_HOST}:{DEFAULT_PORT}", help="HOST:PORT to listen on")
+    where.add_argument("--socket", help="Unix socket path to listen on instead of TCP")
+    parser.add_argument("--workers", type=int, default=1, help="validate large micro-batches on N processes")
+    # invalid statements are normal traffic here, but the engine logs each one at ERROR
+    parser.add_argument("--log-level", default="CRITICAL", help="SQLValidator log level (default CRITICAL)")
+    args = parser.parse_args(argv)
+
+    setup_logger(level=getattr(logging, args.log_level.upper()))
+
+    host, port = parse_address(args.tcp)
+    try:
+        asyncio.run(serve(host, port, unix_socket=args.socket, workers=args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
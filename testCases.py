@@ -1,15 +1,44 @@
 # test_runner.py
-from engine.lexer import Lexer
+import asyncio
+import io
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+from engine.lexer import Lexer, RegexLexer, BytesLexer
+from engine.prescan import PrescanLexer, _numpy_ready
+from engine.token_buffer import TokenBuffer
+from engine.line_index import LineIndex
+from engine.incremental import IncrementalLexer
 from engine.parser import Parser
+from engine.ast_nodes import Select
 from engine.exceptions import SQLError
+from engine.validator import ValidatorEngine
+from engine.cache import ResultCache, query_hash
+from engine.disk_cache import PersistentCache
+from engine.splitter import split_statements
+from service.server import ValidationService, _validate_texts
+from utils.file_crawler import crawl, EMPTY, NO_MATCH, UNREADABLE
 
+# (sql, description, expected outcome: PASS, LEX ERR or PARSE ERR)
 test_cases = [
-    ("SELECT id FROM users;", "Simple Select"),
-    ("SELECT * FRO users;", "Keyword Typo"),
-    ("UPDATE users SET val = 1 WHERE id = (SELECT id FROM t2);", "Update with Subquery"),
-    ("INSERT INTO t1 (id) VALUES (1", "Missing Paren in Insert"),
-    ("SELECT 10.5.2 FROM table;", "Bad Decimal"),
-    ("DELETE FROM users WHERE id = 'active';", "Delete with String")
+    ("SELECT id FROM users;", "Simple Select", "PASS"),
+    ("SELECT * FRO users;", "Keyword Typo", "PARSE ERR"),
+    ("UPDATE users SET val = 1 WHERE id = (SELECT id FROM t2);", "Update with Subquery", "PASS"),
+    ("INSERT INTO t1 (id) VALUES (1", "Missing Paren in Insert", "PARSE ERR"),
+    ("INSERT INTO t1 (id, name) VALUES (1, 'a'), (2, 'b');", "Multi-row Insert", "PASS"),
+    ("SELECT id FROM users WHERE id IN (1, 2, 3);", "IN List", "PASS"),
+    ("SELECT 10.5.2 FROM table;", "Bad Decimal", "LEX ERR"),
+    ("DELETE FROM users WHERE id = 'active';", "Delete with String", "PASS")
+]
+
+# Batch runs share one parse per template: each statement runs after the ones before it,
+# and must get the same status as when it is validated on its own
+template_cases = [
+    (["SELECT a FROM t LIMIT 5;", "SELECT a FROM t LIMIT 'x';"], "LIMIT String after LIMIT Number"),
+    (["SELECT a FROM t LIMIT 5;", "SELECT a FROM t LIMIT ?;"], "LIMIT Placeholder after LIMIT Number"),
+    (["SELECT a FROM t WHERE id = 1;", "SELECT a FROM t WHERE id = 'x';"], "Literal kinds in WHERE"),
 ]
 
 def run_tests():
@@ -19,38 +48,570 @@ def run_tests():
     print(f"{'TEST CASE':<50} | {'STATUS':<10}")
     print("-" * 65)
     
-    for sql, description in test_cases:
+    for sql, description, expected in test_cases:
         lexer = Lexer(sql)
         tokens = []
-        token_err = False
+        outcome = None
         
         # Lexing phase
         while True:
             t = lexer.get_next_token()
             if isinstance(t, SQLError):
-                token_err = True
+                outcome = "LEX ERR"
                 break
             tokens.append(t)
             if t.type.name == 'EOF': break
         
-        if token_err:
-            print(f"{description:<50} | ❌ LEX ERR")
-            failed += 1
-            continue
-
         # Parsing phase
-        parser = Parser(tokens)
-        result = parser.parse()
-        
-        if isinstance(result, SQLError):
-            print(f"{description:<50} | ❌ PARSE ERR")
+        if outcome is None:
+            parser = Parser(tokens)
+            result = parser.parse()
+            outcome = "PARSE ERR" if isinstance(result, SQLError) else "PASS"
+
+        # an error case passes when the error is the one expected
+        if outcome == expected:
+            print(f"{description:<50} | ✅ {outcome}")
+            passed += 1
+        else:
+            print(f"{description:<50} | ❌ {outcome} (expected {expected})")
             failed += 1
+
+    print("-" * 65)
+    print(f"TOTAL: {len(test_cases)} | PASSED: {passed} | FAILED: {failed}")
+    return failed
+
+def run_template_tests():
+    passed = 0
+    failed = 0
+
+    print(f"\n{'TEMPLATE CASE':<50} | {'STATUS':<10}")
+    print("-" * 65)
+
+    for statements, description in template_cases:
+        template_cache = ResultCache()
+        ok = all(
+            ValidatorEngine.validate_by_template(sql, template_cache)["status"]
+            == ValidatorEngine.validate_query(sql)["status"]
+            for sql in statements
+        )
+        if ok:
+            print(f"{description:<50} | ✅ PASS")
+            passed += 1
         else:
+            print(f"{description:<50} | ❌ STALE TEMPLATE")
+            failed += 1
+
+    print("-" * 65)
+    print(f"TOTAL: {len(template_cases)} | PASSED: {passed} | FAILED: {failed}")
+    return failed
+
+def run_checks(title, checks):
+    """Run (description, check) pairs; a check passes when it returns True."""
+    passed = 0
+    failed = 0
+
+    print(f"\n{title:<50} | {'STATUS':<10}")
+    print("-" * 65)
+
+    for description, check in checks:
+        try:
+            ok = check()
+        except Exception as e:
+            ok = False
+            description = f"{description} ({type(e).__name__}: {e})"
+        if ok:
             print(f"{description:<50} | ✅ PASS")
             passed += 1
+        else:
+            print(f"{description:<50} | ❌ FAILED")
+            failed += 1
 
     print("-" * 65)
-    print(f"TOTAL: {len(test_cases)} | PASSED: {passed} | FAILED: {failed}")
+    print(f"TOTAL: {len(checks)} | PASSED: {passed} | FAILED: {failed}")
+    return failed
+
+# ---------------- Statement splitter ---------------- #
+
+SPLIT_SCRIPT = (
+    "SELECT a FROM t WHERE b = 'x;y';\n"
+    "  INSERT INTO t (a) VALUES ('it''s');\n\n"
+    "UPDATE t SET a = 'line one;\nline two' WHERE b = 1; DELETE FROM t WHERE c = ';'"
+)
+
+def _split(source, chunk_size=None):
+    """(text, line, column, offset) of every statement."""
+    if chunk_size is not None:
+        source = io.StringIO(source) if isinstance(source, str) else io.BytesIO(source)
+        statements = split_statements(source, chunk_size=chunk_size)
+    else:
+        statements = split_statements(source)
+    return [(st.text, st.line, st.column, st.offset) for st in statements]
+
+def splitter_checks():
+    whole = _split(SPLIT_SCRIPT)
+    return [
+        ("';' inside quotes does not split", lambda: [text for text, *_ in whole] == [
+            "SELECT a FROM t WHERE b = 'x;y';",
+            "INSERT INTO t (a) VALUES ('it''s');",
+            "UPDATE t SET a = 'line one;\nline two' WHERE b = 1;",
+            "DELETE FROM t WHERE c = ';'"]),
+        ("Statement start positions", lambda: [tuple(pos) for _, *pos in whole] == [
+            (1, 1, 0), (2, 3, 35), (4, 1, 72), (5, 24, 123)]),
+        ("Every chunk size splits alike (str)", lambda: all(
+            _split(SPLIT_SCRIPT, size) == whole for size in range(1, len(SPLIT_SCRIPT) + 1))),
+        ("Every chunk size splits alike (ASCII bytes)", lambda: all(
+            [(text.decode("ascii"), *pos) for text, *pos in _split(SPLIT_SCRIPT.encode(), size)] == whole
+            for size in range(1, len(SPLIT_SCRIPT) + 1))),
+        ("Unterminated quote keeps the rest", lambda: [text for text, *_ in _split("SELECT a FROM t; SELECT 'open; x")]
+            == ["SELECT a FROM t;", "SELECT 'open; x"]),
+        ("Blank input and lone ';' give nothing", lambda: _split(" \n ; ;\n") == []),
+    ]
+
+# ---------------- Bytes input ---------------- #
+
+# the 'é' is two UTF-8 bytes well after the first chunk of most chunk sizes
+MIXED_SCRIPT = SPLIT_SCRIPT + ";\nSELECT café FROM t WHERE b = 'é;x';\nSELECT a FROM t;"
+BAD_UTF8 = b"SELECT a FROM t;\nSELECT a FROM t WHERE b = 1 \xff;"
+
+def _decoded(statements):
+    return [(text if isinstance(text, str) else text.decode("ascii"), *pos) for text, *pos in statements]
+
+def _non_ascii_mid_stream():
+    whole = _split(MIXED_SCRIPT)
+    data = MIXED_SCRIPT.encode("utf-8")
+    return all(_decoded(_split(data, size)) == whole for size in range(1, len(data) + 1))
+
+def _switches_to_str():
+    kinds = [type(text) for text, *_ in _split(MIXED_SCRIPT.encode("utf-8"), 64)]
+    return kinds[0] is bytes and kinds[-2:] == [str, str]
+
+def _bad_utf8_verdicts():
+    """Every mode and buffer type reports the undecodable byte as an unknown char at its place."""
+    expected = ("INVALID", "LEXING", 2, 29)
+    for data in (BAD_UTF8, bytearray(BAD_UTF8), memoryview(BAD_UTF8)):
+        for result in (ValidatorEngine.validate_query(data),
+                       ValidatorEngine.validate_query(data, recover=True),
+                       ValidatorEngine.validate_query(data, cache=ResultCache())):
+            if (result["status"], result["phase"], result["error"]["line"], result["error"]["column"]) != expected:
+                return False
+    return True
+
+def bytes_checks():
+    return [
+        ("Non-ASCII byte mid-stream, every chunk size", _non_ascii_mid_stream),
+        ("ASCII statements stay bytes until the switch", _switches_to_str),
+        ("Non-UTF-8 byte: plain / recover / cache", _bad_utf8_verdicts),
+        ("UTF-8 bytes validate like the str", lambda: ValidatorEngine.validate_query(
+            "SELECT café FROM t".encode("utf-8"))["ast"] == ValidatorEngine.validate_query("SELECT café FROM t")["ast"]),
+        ("ASCII buffers validate like the str", lambda: all(
+            _errors(ValidatorEngine.validate_query(data, recover=True)) == _errors(ValidatorEngine.validate_query(SPLIT_SCRIPT, recover=True))
+            for data in (SPLIT_SCRIPT.encode(), bytearray(SPLIT_SCRIPT.encode()), memoryview(SPLIT_SCRIPT.encode())))),
+    ]
+
+# ---------------- Line index ---------------- #
+
+LINES_TEXT = "SELECT a\n\nFROM t\r\n  WHERE b = 'x\ny';\n"
+
+def _counted_position(text, offset):
+    """(line, column) the old way: counting the newlines before the offset."""
+    return text.count("\n", 0, offset) + 1, offset - (text.rfind("\n", 0, offset) + 1) + 1
+
+def _positions_match(text):
+    index = LineIndex(text)
+    return all(index.position(offset) == _counted_position(text, offset) for offset in range(len(text) + 1))
+
+def _round_trip(text):
+    index = LineIndex(text)
+    return all(index.offset(*index.position(offset)) == offset for offset in range(len(text) + 1))
+
+def _token_positions():
+    """RegexLexer tokens are reported where the char-by-char Lexer reports them."""
+    old = [(t.type, t.line, t.column) for t in Lexer(SPLIT_SCRIPT).iter_tokens()]
+    new = [(t.type, t.line, t.column) for t in RegexLexer(SPLIT_SCRIPT).iter_tokens()]
+    return old == new and all(
+        (line, column) == _counted_position(SPLIT_SCRIPT, t.offset)
+        for t, (_, line, column) in zip(RegexLexer(SPLIT_SCRIPT).iter_tokens(), new))
+
+def line_index_checks():
+    return [
+        ("position() of every offset (str)", lambda: _positions_match(LINES_TEXT)),
+        ("position() of every offset (bytes)", lambda: [LineIndex(LINES_TEXT.encode()).position(o) for o in range(len(LINES_TEXT) + 1)]
+            == [LineIndex(LINES_TEXT).position(o) for o in range(len(LINES_TEXT) + 1)]),
+        ("offset() undoes position()", lambda: _round_trip(LINES_TEXT) and _round_trip("")),
+        ("Blank input and unknown offsets", lambda: LineIndex("").position(0) == (1, 1)
+            and LineIndex(None).position(None) == (None, None)),
+        ("line_text / excerpt", lambda: LineIndex(LINES_TEXT).line_text(4) == "  WHERE b = 'x"
+            and LineIndex("x" * 200).excerpt(1, 150, width=40) == ("x" * 40, 30)),
+        ("Token positions match the Lexer's", _token_positions),
+    ]
+
+# ---------------- Lexers agree ---------------- #
+
+# long enough for several prescan windows, with each kind of lexer error after it
+LEX_SCRIPT = (SPLIT_SCRIPT + ";\nSELECT a FROM t WHERE b IN (1, 2.5, ?, :p, $1) AND c <> d OR e >= 'it''s';\n") * 60
+LEX_ERRORS = ["", " @", " 'open", " 1.2.3", " !x", " :1", " $a"]
+
+def _lexed(lexer, recover=False):
+    """Tokens and errors of a lexer as comparable tuples."""
+    items = lexer.iter_tokens(recover=True) if recover else lexer.iter_tokens()
+    return [(item.msg, item.line, item.column) if isinstance(item, SQLError)
+            else (item.type, item.value, item.line, item.column) for item in items]
+
+def _lexers_agree(make, recover=False):
+    return all(_lexed(make(LEX_SCRIPT + tail), recover) == _lexed(RegexLexer(LEX_SCRIPT + tail), recover)
+               for tail in LEX_ERRORS)
+
+def _buffers_agree():
+    """PrescanLexer.fill (validate_query's bulk path) stores the RegexLexer's tokens."""
+    for tail in LEX_ERRORS:
+        bulk, bulk_error = TokenBuffer.from_lexer(PrescanLexer(LEX_SCRIPT + tail))
+        plain, plain_error = TokenBuffer.from_lexer(RegexLexer(LEX_SCRIPT + tail))
+        if (bulk.types, bulk.starts, bulk.ends) != (plain.types, plain.starts, plain.ends):
+            return False
+        if (bulk_error is None) != (plain_error is None):
+            return False
+        if bulk_error is not None and (bulk_error.msg, bulk_error.line, bulk_error.column) != (plain_error.msg, plain_error.line, plain_error.column):
+            return False
+    return True
+
+def lexer_checks():
+    checks = [
+        ("Lexer matches RegexLexer", lambda: _lexers_agree(Lexer)),
+        ("BytesLexer matches RegexLexer", lambda: _lexers_agree(lambda text: BytesLexer(text.encode("ascii")))),
+        ("BytesLexer matches RegexLexer (recover)", lambda: _lexers_agree(
+            lambda text: BytesLexer(text.encode("ascii")), recover=True)),
+    ]
+    if not _numpy_ready():
+        print("\n(NumPy is not installed: PrescanLexer checks skipped)")
+        return checks
+    return checks + [
+        ("PrescanLexer matches RegexLexer", lambda: _lexers_agree(PrescanLexer)),
+        ("PrescanLexer matches RegexLexer (recover)", lambda: _lexers_agree(PrescanLexer, recover=True)),
+        ("PrescanLexer fills the same TokenBuffer", _buffers_agree),
+    ]
+
+# ---------------- Result cache and batch order ---------------- #
+
+BATCH_QUERIES = [
+    "SELECT id FROM users;",
+    "SELECT * FRO users;",
+    "DELETE FROM users WHERE id = 1;",
+    "SELECT 10.5.2 FROM t;",
+    "SELECT id FROM users;",
+    "UPDATE t SET a = 1 WHERE b = 'x';",
+    "INSERT INTO t1 (id) VALUES (1",
+] * 6
+
+def _lru_evicts_oldest():
+    cache = ResultCache(2)
+    cache.put("a", {"status": "VALID"})
+    cache.put("b", {"status": "VALID"})
+    cache.get("a")
+    cache.put("c", {"status": "VALID"})
+    return cache.get("b") is None and cache.get("a") is not None and cache.evictions == 1
+
+def _zero_size_cache():
+    cache = ResultCache(0)
+    cache.put("a", {"status": "VALID"})
+    return len(cache) == 0
+
+def _cached_validate_query():
+    cache = ResultCache()
+    first = [ValidatorEngine.validate_query(q, cache=cache)["status"] for q in BATCH_QUERIES]
+    hits = cache.hits
+    again = [ValidatorEngine.validate_query(q, cache=cache)["status"] for q in BATCH_QUERIES]
+    plain = [ValidatorEngine.validate_query(q)["status"] for q in BATCH_QUERIES]
+    return first == again == plain and cache.hits - hits == len(BATCH_QUERIES)
+
+def _batch_in_order(**kwargs):
+    expected = [ValidatorEngine.validate_query(q)["status"] for q in BATCH_QUERIES]
+    pairs = list(ValidatorEngine.iter_batch(BATCH_QUERIES, **kwargs))
+    return [q for q, _ in pairs] == BATCH_QUERIES and [r["status"] for _, r in pairs] == expected
+
+def _batch_shared_cache():
+    cache = ResultCache()
+    first = list(ValidatorEngine.iter_batch(BATCH_QUERIES, workers=1, cache=cache))
+    misses = cache.misses
+    second = list(ValidatorEngine.iter_batch(BATCH_QUERIES, workers=1, cache=cache))
+    return first == second and cache.misses == misses
+
+def cache_checks():
+    return [
+        ("LRU evicts the least recently used", _lru_evicts_oldest),
+        ("Zero-size cache stores nothing", _zero_size_cache),
+        ("str and bytes share a key", lambda: query_hash("SELECT 1") == query_hash(b"SELECT 1")),
+        ("Cached validate_query matches uncached", _cached_validate_query),
+        ("iter_batch keeps order (1 worker)", lambda: _batch_in_order(workers=1)),
+        ("iter_batch keeps order (pool, small chunks)", lambda: _batch_in_order(workers=2, chunk_size=3)),
+        ("iter_batch keeps order (no templates)", lambda: _batch_in_order(workers=2, chunk_size=4, templates=False)),
+        ("iter_batch reuses a shared cache", _batch_shared_cache),
+    ]
+
+# ---------------- Persistent cache ---------------- #
+
+def _persistent_reload():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.sqlite"
+        with PersistentCache(path, version="v1") as cache:
+            first = list(ValidatorEngine.iter_batch(BATCH_QUERIES, workers=1, cache=cache))
+        with PersistentCache(path, version="v1") as cache:
+            second = list(ValidatorEngine.iter_batch(BATCH_QUERIES, workers=1, cache=cache))
+            return first == second and cache.misses == 0 and cache.hits > 0
+
+def _persistent_version_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.sqlite"
+        key = query_hash("SELECT id FROM users;")
+        with PersistentCache(path, version="v1") as cache:
+            cache.put(key, {"status": "VALID"})
+        with PersistentCache(path, version="v1") as cache:
+            kept = cache.get(key) == {"status": "VALID"}
+        with PersistentCache(path, version="v2") as cache:
+            return kept and cache.get(key) is None and len(cache) == 0
+
+def _persistent_pending_reads():
+    with tempfile.TemporaryDirectory() as tmp:
+        with PersistentCache(Path(tmp) / "cache.sqlite", version="v1", commit_every=100) as cache:
+            cache.put(b"k", {"status": "INVALID"})
+            return cache.get(b"k") == {"status": "INVALID"}
+
+def persistent_cache_checks():
+    return [
+        ("Results survive a reopen", _persistent_reload),
+        ("Another engine version drops results", _persistent_version_change),
+        ("Unflushed results are readable", _persistent_pending_reads),
+    ]
+
+# ---------------- Recover vs. plain validation ---------------- #
+
+# (text, expected status) -- both modes must agree
+MODE_CASES = [
+    ("", "INVALID"),
+    (" ; ;\n", "INVALID"),
+    ("SELECT a FROM t; foo", "INVALID"),
+    ("SELECT a FROM t foo", "INVALID"),
+    ("SELECT a FROM t; SELECT * FRO x", "INVALID"),
+    ("SELECT a FROM t; @", "INVALID"),
+    ("SELECT a FROM t; SELECT b FROM u;", "VALID"),
+    ("SELECT a FROM t WHERE x = 1 DELETE FROM u", "VALID"),
+    ("DELETE FROM t;;;", "VALID"),
+]
+
+def _same_verdict(sql, expected):
+    plain = ValidatorEngine.validate_query(sql)
+    script = ValidatorEngine.validate_query(sql, recover=True)
+    template = ValidatorEngine.validate_by_template(sql, ResultCache())
+    return plain["status"] == script["status"] == template["status"] == expected
+
+def mode_checks():
+    return [(f"Same verdict: {sql!r}"[:50], lambda sql=sql, expected=expected: _same_verdict(sql, expected))
+            for sql, expected in MODE_CASES]
+
+# ---------------- Incremental lexing and validation ---------------- #
+
+EDIT_SCRIPT = (
+    "SELECT id, name FROM users WHERE id = 1;\n"
+    "INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y');\n"
+    "UPDATE t SET a = 'q' WHERE id >= 3;\n"
+    "DELETE FROM t WHERE id = (SELECT x FROM y WHERE z = 2);\n"
+)
+EDIT_INSERTS = ["", "x", " ", ";", "\n", "'", "1.5", ", 2", ")", "SELECT a FROM t", "@"]
+
+def _random_edits(count, seed=1):
+    """IncrementalLexer states after random edits, with the text each one must match."""
+    rng = random.Random(seed)
+    session = IncrementalLexer(EDIT_SCRIPT * 3)
+    for _ in range(count):
+        text = session.text
+        offset = rng.randint(0, len(text))
+        removed = rng.randint(0, min(8, len(text) - offset))
+        session.apply_edit(offset, removed, rng.choice(EDIT_INSERTS))
+        yield session
+
+def _same_as_full_lex():
+    for session in _random_edits(300):
+        full, error = TokenBuffer.from_lexer(RegexLexer(session.text))
+        if (full.types, full.starts, full.ends) != (session.tokens.types, session.tokens.starts, session.tokens.ends):
+            return False
+        if (error is None) != (session.error is None):
+            return False
+        if error is not None and (error.msg, error.line, error.column) != (session.error.msg, session.error.line, session.error.column):
+            return False
+    return True
+
+def _errors(result):
+    return [(e["phase"], e["message"], e["line"], e["column"]) for e in result["errors"]]
+
+def _same_as_full_validation():
+    for session in _random_edits(300, seed=2):
+        result = ValidatorEngine.validate_session(session)
+        if session.error is None and _errors(result) != _errors(ValidatorEngine.validate_query(session.text, recover=True)):
+            return False
+        if session.error is not None and result["status"] != "INVALID":
+            return False
+    return True
+
+def _edit_reparses_one_statement():
+    session = IncrementalLexer(EDIT_SCRIPT * 50)
+    ValidatorEngine.validate_session(session)
+    parsed = []
+    parse_piece = session._parse_piece
+    session._parse_piece = lambda *args: parsed.append(args) or parse_piece(*args)
+    offset = session.text.index("FROM t WHERE id = (SELECT", len(EDIT_SCRIPT) * 20)
+    session.apply_edit(offset, len("FROM"), "FRO")
+    result = ValidatorEngine.validate_session(session)
+    return len(parsed) == 1 and result["error"]["line"] == 84 and result["error"]["message"] == "Syntax Error : Expected FROM"
+
+def incremental_checks():
+    return [
+        ("apply_edit matches a full re-lex", _same_as_full_lex),
+        ("validate_session matches recover mode", _same_as_full_validation),
+        ("An edit re-parses only its statement", _edit_reparses_one_statement),
+        ("validate_tokens checks every statement", lambda: ValidatorEngine.validate_tokens(
+            IncrementalLexer("SELECT a FROM t; SELECT * FRO x;").tokens)["status"] == "INVALID"),
+    ]
+
+# ---------------- Deeply nested subqueries ---------------- #
+
+DEPTH = 3000
+
+def _nested_select(depth):
+    return "SELECT a FROM t WHERE b = (" * depth + "SELECT a FROM t" + ")" * depth
+
+def _parse(sql, **kwargs):
+    return Parser(list(Lexer(sql).iter_tokens()), **kwargs).parse()
+
+def _deep_ast_round_trip():
+    tree, same = _parse(_nested_select(DEPTH)), _parse(_nested_select(DEPTH))
+    other = _parse(_nested_select(DEPTH).replace("SELECT a FROM t)", "SELECT c FROM t)"))
+    text = repr(tree)
+    # walk the dict form without recursing either: one Subquery per level
+    data, levels = tree.to_dict(), 0
+    while data["where"] is not None:
+        data = data["where"]["value"]["select"]
+        levels += 1
+    return (isinstance(tree, Select) and tree == same and tree != other
+            and text.count("Subquery(") == DEPTH and levels == DEPTH)
+
+def _where_rules():
+    """Result types of a flat and of a subquery WHERE clause."""
+    flat = Parser(list(Lexer("WHERE a IN (1, 2)").iter_tokens()))._handle_where_clause()
+    nested = Parser(list(Lexer("WHERE a = (SELECT b FROM c)").iter_tokens()))._handle_where_clause()
+    return type(flat).__name__, type(nested).__name__
+
+def deep_ast_checks():
+    return [
+        (f"{DEPTH} levels: build, repr, ==, to_dict", _deep_ast_round_trip),
+        ("Flat WHERE needs no rule generator", lambda: _where_rules() == ("InPredicate", "generator")),
+        ("max_depth stops nesting with an SQLError", lambda: isinstance(
+            _parse(_nested_select(50), max_depth=10), SQLError)),
+    ]
+
+# ---------------- File crawler ---------------- #
+
+CRAWL_FILES = {
+    "a.sql": "SELECT a FROM t;\nSELECT * FRO x;\n",
+    "b.txt": "  \n;\n",
+    "notes.md": "not SQL",
+    "sub/c.sql": "DELETE FROM t WHERE a = 1;",
+}
+
+def _crawled(*patterns):
+    """(file relative to the temp dir, statement, line, column, status) of every crawl record."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for name, text in CRAWL_FILES.items():
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text(text, encoding="utf-8")
+        (root / "empty").mkdir()
+        records = list(crawl([pattern.format(root=tmp) for pattern in patterns], workers=1))
+        return [(str(Path(r["file"]).relative_to(root)).replace("\\", "/"), r["statement"], r["line"], r["column"], r["status"])
+                for r in records]
+
+def crawler_checks():
+    return [
+        ("Directory walk: per-statement records", lambda: _crawled("{root}") == [
+            ("a.sql", 1, 1, 1, "VALID"), ("a.sql", 2, 2, 10, "INVALID"),
+            ("b.txt", None, None, None, EMPTY), ("sub/c.sql", 1, 1, 1, "VALID")]),
+        ("Glob and repeated file given once", lambda: _crawled("{root}/**/*.sql", "{root}/a.sql") == [
+            ("a.sql", 1, 1, 1, "VALID"), ("a.sql", 2, 2, 10, "INVALID"), ("sub/c.sql", 1, 1, 1, "VALID")]),
+        ("Directory and glob without files: NO_MATCH", lambda: _crawled("{root}/empty", "{root}/*.csv") == [
+            ("empty", None, None, None, NO_MATCH), ("*.csv", None, None, None, NO_MATCH)]),
+        ("Missing file: UNREADABLE", lambda: _crawled("{root}/missing.sql", "{root}/sub") == [
+            ("missing.sql", None, None, None, UNREADABLE), ("sub/c.sql", 1, 1, 1, "VALID")]),
+    ]
+
+# ---------------- Validation service ---------------- #
+
+async def _service_requests():
+    service = ValidationService()
+    service.start()
+    try:
+        requests = [(BATCH_QUERIES[i:i + 3], i % 4 == 0) for i in range(20)]
+        answers = await asyncio.gather(*(service.validate(texts, recover) for texts, recover in requests))
+        repeat = await service.validate(BATCH_QUERIES[1:4])
+        return requests, answers, repeat, service.stats()
+    finally:
+        await service.close()
+
+def _micro_batches_in_order():
+    requests, answers, _, stats = asyncio.run(_service_requests())
+    return all(answer == _validate_texts(texts, recover) for (texts, recover), answer in zip(requests, answers)) \
+        and stats["batches"] < stats["requests"]
+
+def _service_cache_hits():
+    _, answers, repeat, stats = asyncio.run(_service_requests())
+    return repeat == answers[1] and stats["cache"]["hits"] >= 3
+
+async def _service_protocol():
+    service = ValidationService()
+    service.start()
+    server = await asyncio.start_server(service.handle_client, "127.0.0.1", 0)
+    try:
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        lines = [
+            {"id": 1, "sql": "SELECT a FROM t;"},
+            {"id": 2, "batch": ["SELECT * FRO t;", "DELETE FROM t;"]},
+            {"id": 3, "sql": "SELECT a FROM t; foo", "recover": True},
+            {"id": 4, "op": "ping"},
+        ]
+        writer.write(b"".join(json.dumps(line).encode() + b"\n" for line in lines) + b"not json\n")
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for _ in range(len(lines) + 1)]
+        writer.close()
+        return {reply["id"]: reply for reply in replies}
+    finally:
+        server.close()
+        await service.close()
+
+def _pipelined_replies():
+    replies = asyncio.run(_service_protocol())
+    return replies[1]["result"]["status"] == "VALID" \
+        and [r["status"] for r in replies[2]["results"]] == ["INVALID", "VALID"] \
+        and replies[2]["results"][0]["token_count"] is None \
+        and replies[3]["result"]["errors"][0]["message"] == "Unsupported statement start: IDENTIFIER" \
+        and replies[4]["ok"] is True \
+        and replies[None]["error"].startswith("Invalid JSON")
+
+def service_checks():
+    return [
+        ("Micro-batched requests get their own results", _micro_batches_in_order),
+        ("Repeated statements come from the cache", _service_cache_hits),
+        ("Pipelined JSON lines are all answered", _pipelined_replies),
+    ]
 
 if __name__ == "__main__":
-    run_tests()
\ No newline at end of file
+    failed = run_tests()
+    failed += run_template_tests()
+    failed += run_checks("SPLITTER CHECK", splitter_checks())
+    failed += run_checks("BYTES INPUT CHECK", bytes_checks())
+    failed += run_checks("LINE INDEX CHECK", line_index_checks())
+    failed += run_checks("LEXER CHECK", lexer_checks())
+    failed += run_checks("RECOVER MODE CHECK", mode_checks())
+    failed += run_checks("CACHE / BATCH CHECK", cache_checks())
+    failed += run_checks("PERSISTENT CACHE CHECK", persistent_cache_checks())
+    failed += run_checks("INCREMENTAL CHECK", incremental_checks())
+    failed += run_checks("DEEP AST CHECK", deep_ast_checks())
+    failed += run_checks("CRAWLER CHECK", crawler_checks())
+    failed += run_checks("SERVICE CHECK", service_checks())
+    sys.exit(1 if failed else 0)
\ No newline at end of file
@@ -0,0 +1,223 @@
+import glob
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.validator import ValidatorEngine
+from utils.file_handler import FileHandler, TEXT_SUFFIXES
+
+logger = logging.getLogger("SQLValidator")
+
+# Files picked up when walking a directory or expanding a glob
+INPUT_SUFFIXES = TEXT_SUFFIXES + (".json",)
+
+# Reader threads, and how many files they may have read ahead of the validation
+DEFAULT_READ_THREADS = 8
+READ_AHEAD_PER_THREAD = 4
+
+# Record fields, one record per statement (see statement_record)
+FIELDS = ("file", "statement", "line", "column", "status", "phase", "message", "hint")
+
+# status of the single record reported for a file that has no statement to validate
+EMPTY = "EMPTY"
+UNREADABLE = "UNREADABLE"
+# ... and for a directory or glob pattern that gave no file at all
+NO_MATCH = "NO_MATCH"
+
+GLOB_CHARS = "*?["
+
+
+def iter_paths(patterns, suffixes=INPUT_SUFFIXES):
+    """
+    Lazily expand files, directories (walked recursively) and glob patterns
+    ("**" included) into file paths. Directories and globs only give files with
+    one of `suffixes`; a file named as such is always given, even a missing one,
+    so it gets reported as unreadable. A directory or glob that gives no file
+    is given as is, so it gets reported too (see crawl). A file matched by
+    several patterns is given once.
+    """
+    seen = set()
+    for pattern in patterns:
+        if _is_glob(pattern):
+            matches = glob.iglob(pattern, recursive=True)
+            explicit = False
+        else:
+            matches = [pattern]
+            explicit = True
+
+        matched = False
+        for match in matches:
+            if os.path.isdir(match):
+                found = _walk(match, suffixes)
+            elif explicit or match.endswith(suffixes):
+                found = [match]
+            else:
+                continue
+            for path in found:
+                matched = True
+                key = os.path.normpath(path)
+                if key not in seen:
+                    seen.add(key)
+                    yield path
+
+        key = os.path.normpath(pattern)
+        if not matched and key not in seen:
+            seen.add(key)
+            yield pattern
+
+
+def _is_glob(pattern):
+    return any(char in pattern for char in GLOB_CHARS)
+
+
+def _walk(top, suffixes):
+    """Files under a directory in a stable (sorted) order, one directory listing at a time."""
+    for root, dirs, files in os.walk(top):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(suffixes):
+                yield os.path.join(root, name)
+
+
+def _read_file(path):
+    """
+    Reader thread side: the statements of one file, or None when it can't be used.
+    Files FileHandler would memory-map stay a lazy iterator, split while validated.
+    """
+    try:
+        statements = FileHandler.iter_statements(path, raw=True) if os.path.isfile(path) else None
+        if statements is None:
+            return None
+        if os.path.getsize(path) >= FileHandler.mmap_threshold:
+            return statements
+        return list(statements)
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error(f"Failed to read {path} : {e}")
+        return None
+
+
+def read_files(paths, threads=DEFAULT_READ_THREADS):
+    """
+    Yield (path, statements or None) in path order. Files are read and split on
+    `threads` threads while the caller works on earlier ones; at most
+    threads * READ_AHEAD_PER_THREAD files are read ahead, and a file is open only
+    while one of the threads reads it.
+    """
+    threads = max(1, threads)
+    pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="sql-reader")
+    pending = deque()
+    try:
+        for path in paths:
+            pending.append((path, pool.submit(_read_file, path)))
+            if len(pending) >= threads * READ_AHEAD_PER_THREAD:
+                path, future = pending.popleft()
+                yield path, future.result()
+        while pending:
+            path, future = pending.popleft()
+            yield path, future.result()
+    finally:
+        # reads not started yet are dropped (shutdown(cancel_futures=True) is 3.9+)
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown()
+
+
+class _FileEntry:
+    """A file read so far: how many statements it gave, whether it could be read."""
+    __slots__ = ("path", "statements", "readable")
+
+    def __init__(self, path, readable):
+        self.path = path
+        self.statements = 0
+        self.readable = readable
+
+
+class FileStatement:
+    """One statement of a crawled file; iter_batch validates its .text."""
+    __slots__ = ("entry", "index", "statement")
+
+    def __init__(self, entry, index, statement):
+        self.entry = entry
+        self.index = index
+        self.statement = statement
+
+    @property
+    def text(self):
+        return self.statement.text
+
+
+def statement_record(path, index, statement, result):
+    """Record of one validated statement, positions relative to the whole file."""
+    record = {
+        "file": path,
+        "statement": index,
+        "line": statement.line,
+        "column": statement.column,
+        "status": result["status"],
+        "phase": result["phase"],
+        "message": None,
+        "hint": None,
+    }
+    err = result["error"]
+    if err is not None:
+        record["line"], record["column"] = statement.source_position(err["line"], err["column"])
+        record["message"] = err["message"]
+        record["hint"] = err["hint"]
+    return record
+
+
+def _file_record(entry):
+    """The one record of a file with nothing validated: empty, unreadable, or a pattern without files."""
+    record = dict.fromkeys(FIELDS)
+    record["file"] = entry.path
+    if entry.readable:
+        record["status"] = EMPTY
+    elif os.path.isdir(entry.path) or _is_glob(entry.path):
+        record["status"] = NO_MATCH
+    else:
+        record["status"] = UNREADABLE
+    return record
+
+
+def crawl(patterns, workers=None, threads=DEFAULT_READ_THREADS, **batch_options):
+    """
+    Validate every statement of every file matched by `patterns` (files,
+    directories, globs; see iter_paths) and yield one record per statement in
+    file order, with the FIELDS keys. A file without statements gives a single
+    record of status EMPTY, one that can't be read a record of status UNREADABLE,
+    and a directory or glob without any file a record of status NO_MATCH.
+
+    Files are read on `threads` threads (read_files) and the statements of all of
+    them go through one ValidatorEngine.iter_batch run, so small files share
+    chunks on the `workers` processes. Only the files read ahead and the chunks
+    in flight are held in memory. batch_options go to iter_batch (cache, ...).
+    """
+    files = deque()         # entries read, not yet fully reported
+
+    def statements():
+        for path, items in read_files(iter_paths(patterns), threads):
+            entry = _FileEntry(path, items is not None)
+            files.append(entry)
+            if items is None:
+                continue
+            try:
+                for index, statement in enumerate(items, start=1):
+                    entry.statements = index
+                    yield FileStatement(entry, index, statement)
+            except (OSError, UnicodeDecodeError) as e:
+                # a memory-mapped file failing part way: report what was read
+                logger.error(f"Failed to read {path} : {e}")
+
+    for item, result in ValidatorEngine.iter_batch(statements(), workers=workers, **batch_options):
+        # every file read before this one is done; the ones without statements still need their record
+        while files[0] is not item.entry:
+            done = files.popleft()
+            if not done.statements:
+                yield _file_record(done)
+        yield statement_record(item.entry.path, item.index, item.statement, result)
+
+    while files:
+        done = files.popleft()
+        if not done.statements:
+            yield _file_record(done)
@@ -1,14 +1,75 @@
+import codecs
 import logging
 from pathlib import Path
-import json
+from engine.splitter import split_statements, split_file
 
 # Get the logger we already configured by its name
 logger = logging.getLogger("SQLValidator")
 
+# Plain SQL/text inputs
+TEXT_SUFFIXES = (".txt", ".sql")
+
+
+class MappedFile:
+    """
+    A large input file read through a read-only memory map instead of one big
+    read_text() copy. Iterating it yields decoded text chunks, so it can go
+    straight into engine.splitter.split_statements.
+    """
+    def __init__(self, path: Path, encoding="utf-8", chunk_size=1024 * 1024):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.size = self.path.stat().st_size
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return self.iter_chunks()
+
+    def iter_chunks(self):
+        """Decode the map one chunk at a time; the file stays mapped only while iterating."""
+        if self.size == 0:
+            return
+        import mmap
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for pos in range(0, len(mapped), self.chunk_size):
+                text = decoder.decode(mapped[pos:pos + self.chunk_size])
+                if text:
+                    yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def iter_raw_chunks(self):
+        """The map as undecoded bytes chunks."""
+        if self.size == 0:
+            return
+        import mmap
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for pos in range(0, len(mapped), self.chunk_size):
+                yield mapped[pos:pos + self.chunk_size]
+
+    def iter_statements(self, raw=False):
+        """Statements of the file; with raw, ASCII text stays bytes (see split_statements)."""
+        return split_statements(self.iter_raw_chunks() if raw else self, encoding=self.encoding)
+
+    def read_text(self):
+        """The whole decoded file, for callers that really need one string."""
+        return "".join(self.iter_chunks())
+
+    def __repr__(self):
+        return f"MappedFile({self.path}, {self.size} bytes)"
+
 
 class FileHandler:
     """A utility class to manage different file input types."""
 
+    # Text inputs at least this big are memory-mapped instead of read whole
+    mmap_threshold = 32 * 1024 * 1024
+
     @staticmethod
     def read(source: str):
         path = Path(source)
@@ -20,10 +81,38 @@ class FileHandler:
         logger.info(f"Valid String Found : {source}")
         return source   # its just a raw string
     
+    @staticmethod
+    def iter_statements(source: str, raw=False):
+        """
+        Lazily yield engine.splitter.Statement objects from a file or a raw SQL string.
+        Text files are split chunk by chunk instead of being read whole.
+        With raw, text files are read as bytes and the statements of an ASCII file
+        keep bytes text, which the engine lexes without decoding; only callers that
+        never display statement.text should ask for it.
+        Returns None when the file can't be used.
+        """
+        path = Path(source)
+
+        if path.is_file() and path.suffix in TEXT_SUFFIXES:
+            logger.info(f"Valid File Found : {path}")
+            if path.stat().st_size >= FileHandler.mmap_threshold:
+                return MappedFile(path).iter_statements(raw)
+            return split_file(path, raw=raw)
+
+        content = FileHandler.read(source)
+        if not content:
+            return None
+        if isinstance(content, MappedFile):
+            return content.iter_statements()
+        return split_statements(content)
+
     @staticmethod
     def _handle_file(path: Path):
         """Internal helper method to route file extensions."""
-        if path.suffix == ".txt":
+        if path.suffix in TEXT_SUFFIXES:
+            if path.stat().st_size >= FileHandler.mmap_threshold:
+                logger.info(f"Memory-mapping large file : {path}")
+                return MappedFile(path)
             return path.read_text()
         elif path.suffix == '.json':
             return FileHandler._parse_json(path)
@@ -33,6 +122,8 @@ class FileHandler:
         
     @staticmethod
     def _parse_json(path: Path):
+        # imported here like mmap: most runs never read a .json input
+        import json
         try:
             with open(path, 'r') as f:
                 data = json.load(f)
@@ -1,8 +1,30 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from engine.tracing import TRACER
+
+# Background writer shared by every setup_logger() call
+_listener = None
+
+def setup_logger(level=logging.INFO, trace=False, trace_sample=1):
+    """
+    Configures the "SQLValidator" logger. Records are put on a queue and written to
+    Project.log / stderr by a background QueueListener thread, so the validating
+    thread never waits on file or terminal I/O.
+
+    trace: emit the per-token parser trace (DEBUG), for one statement in trace_sample.
+    """
+    global _listener
 
-def setup_logger():
     logger = logging.getLogger("SQLValidator")
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(logging.DEBUG if trace else level)
+    TRACER.configure(enabled=trace, sample_every=trace_sample)
+
+    if _listener is not None:
+        _listener.stop()
+        logger.handlers.clear()
 
     # create format of the logs
     log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -10,14 +32,21 @@ def setup_logger():
     #TODO : Create a FileHandler and a StreamHandler -> DONE
     file_pipe = logging.FileHandler('Project.log', mode='w')
     file_pipe.setFormatter(log_format)
-    logger.addHandler(file_pipe)
 
     #TODO : Add the formatter to those handlers -> DONE
     stream_pipe = logging.StreamHandler()
     stream_pipe.setFormatter(log_format)
-    logger.addHandler(stream_pipe)
 
     #TODO : Add the handlers to the logger -> DONE
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, file_pipe, stream_pipe)
+    _listener.start()
 
     return logger
 
+@atexit.register
+def _stop_listener():
+    """Flush whatever is still queued before the interpreter exits."""
+    if _listener is not None:
+        _listener.stop()
@@ -1,13 +1,21 @@
 import os
 import json
 import csv
+import time
 from pathlib import Path
 
 # 🔹 Output directory constant
 OUTPUT_DIR = Path("output")
 
-# 🔹 Create folder automatically if not exists
-OUTPUT_DIR.mkdir(exist_ok=True)
+# 🔹 Streaming writers flush after this many records, or this many seconds
+DEFAULT_FLUSH_EVERY = 1000
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+def ensure_output_dir():
+    """Create the output folder on first save (not at import, so read-only runs leave no trace)."""
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    return OUTPUT_DIR
 
 
 class OutputHandler:
@@ -15,14 +23,14 @@ class OutputHandler:
     @staticmethod
     def save_txt(filename: str, content: str):
         # save inside output folder
-        path = OUTPUT_DIR / filename
+        path = ensure_output_dir() / filename
         path.write_text(content, encoding="utf-8")
         print(f"[Saved TXT] {path}")
     
     @staticmethod
     def save_json(filename: str, data):
         # save inside output folder
-        path = OUTPUT_DIR / filename
+        path = ensure_output_dir() / filename
         with open(path, 'w', encoding="utf-8") as f:
             json.dump(data, f, indent=4)
         print(f"[Saved JSON] {path}")
@@ -36,7 +44,7 @@ class OutputHandler:
             return
         
         # save inside output folder
-        path = OUTPUT_DIR / filename
+        path = ensure_output_dir() / filename
 
         # determine headers
         if isinstance(data[0], dict):
@@ -54,3 +62,81 @@ class OutputHandler:
                     writer.writerow(row)
 
         print(f"[Saved CSV] {path}")
+
+
+class StreamWriter:
+    """
+    Base of the streaming report writers: each record goes to the file as soon as
+    it is produced, so memory stays flat however big the batch is. The file is
+    flushed every `flush_every` records or `flush_interval` seconds.
+    Use as a context manager (or call close()).
+    """
+    label = "FILE"
+
+    def __init__(self, filename: str, flush_every=DEFAULT_FLUSH_EVERY, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = ensure_output_dir() / filename
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._file = open(self.path, 'w', newline='', encoding="utf-8")
+        self._last_flush = time.monotonic()
+
+    def write(self, item):
+        self._write(item)
+        self.count += 1
+        if self.count % self.flush_every == 0 or time.monotonic() - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+    def _write(self, item):
+        raise NotImplementedError
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        print(f"[Saved {self.label}] {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class NDJSONWriter(StreamWriter):
+    """One JSON object per line."""
+    label = "NDJSON"
+
+    def _write(self, record):
+        self._file.write(json.dumps(record))
+        self._file.write("\n")
+
+
+class CSVStreamWriter(StreamWriter):
+    """
+    data: dicts (the header comes from the first one's keys) or lists
+    """
+    label = "CSV"
+
+    def __init__(self, filename: str, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._writer = csv.writer(self._file)
+
+    def _write(self, row):
+        if self.count == 0:
+            if isinstance(row, dict):
+                self._writer.writerow(row.keys())
+            else:
+                self._writer.writerow([f"Column{i+1}" for i in range(len(row))])
+        self._writer.writerow(row.values() if isinstance(row, dict) else row)
+
+
+class TextStreamWriter(StreamWriter):
+    """Text sections separated by a newline, like save_txt("\n".join(sections))."""
+    label = "TXT"
+
+    def _write(self, section):
+        if self.count:
+            self._file.write("\n")
+        self._file.write(section)